@@ -0,0 +1,218 @@
+# authorization_index.py
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from supabase_utils import supabase, check_authorization, check_authorization_many, event_window, normalize_plate
+
+REFRESH_INTERVAL = int(os.getenv("AUTH_INDEX_REFRESH_SECONDS", "60"))
+# Event windows come from the dashboard's scheduler snapshots while they keep arriving
+EVENT_SNAPSHOT_MAX_AGE = int(os.getenv("EVENT_SNAPSHOT_MAX_AGE_SECONDS", "600"))
+PAGE_SIZE = 1000  # PostgREST caps a single select at 1000 rows
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a Supabase timestamp into a naive local datetime."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _fetch_all(table: str, columns: str, apply_filters=None) -> List[Dict]:
+    """Fetch every row of a filtered select, paging past the 1000-row cap."""
+    rows = []
+    start = 0
+    while True:
+        query = supabase.table(table).select(columns)
+        if apply_filters:
+            query = apply_filters(query)
+        page = query.range(start, start + PAGE_SIZE - 1).execute().data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+class IntervalSet:
+    """Validity windows for one plate, answering "is t inside any window" in O(log n)."""
+
+    def __init__(self, windows: Iterable[Tuple[datetime, datetime]]):
+        ordered = sorted(windows)
+        self.starts = [start for start, _ in ordered]
+        # Running maximum of end times, so overlapping windows need no merge step
+        self.max_ends = []
+        latest = None
+        for _, end in ordered:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def contains(self, moment: datetime) -> bool:
+        idx = bisect_right(self.starts, moment)
+        return idx > 0 and self.max_ends[idx - 1] >= moment
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class AuthorizationIndex:
+    """In-process copy of every table check_authorization consults.
+
+    Permanent plates live in a set, guest and event windows in an IntervalSet
+    per plate. The whole index is rebuilt in bulk and swapped in atomically,
+    so lookups never take a lock or touch the network.
+    """
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.permanent: Set[str] = set()
+        self.guests: Dict[str, IntervalSet] = {}
+        self.events: Dict[str, IntervalSet] = {}
+        self.loaded_at: Optional[datetime] = None
+        self.event_snapshot_version: Optional[str] = None
+        self.event_snapshot_at: Optional[datetime] = None
+        self._write_lock = threading.Lock()
+        self._invalidated = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def load(self):
+        """Bulk-load the index from Supabase and swap it in."""
+        now = datetime.now()
+        # An event that runs past midnight is still on from yesterday's date
+        since = (now.date() - timedelta(days=1)).isoformat()
+
+        permanent = {row["plate_number"] for row in _fetch_all("authorized_vehicles", "plate_number")}
+
+        guest_windows: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        for row in _fetch_all(
+            "guest_vehicles", "plate_number, valid_from, valid_until",
+            lambda q: q.gte("valid_until", now.isoformat())
+        ):
+            guest_windows.setdefault(row["plate_number"], []).append(
+                (_parse_timestamp(row["valid_from"]), _parse_timestamp(row["valid_until"]))
+            )
+
+        event_windows: Optional[Dict[str, List[Tuple[datetime, datetime]]]] = None
+        if not self._event_snapshot_fresh(now):
+            event_windows = self._load_event_windows(since)
+
+        with self._write_lock:
+            self.permanent = permanent
+            self.guests = {plate: IntervalSet(w) for plate, w in guest_windows.items()}
+            if event_windows is not None:
+                self.events = {plate: IntervalSet(w) for plate, w in event_windows.items()}
+            self.loaded_at = now
+        print(f"[*] Authorization index loaded: {len(permanent)} permanent, "
+              f"{len(guest_windows)} guest, {len(self.events)} event plates")
+
+    def _event_snapshot_fresh(self, now: datetime) -> bool:
+        if self.event_snapshot_at is None:
+            return False
+        return (now - self.event_snapshot_at).total_seconds() < EVENT_SNAPSHOT_MAX_AGE
+
+    def _load_event_windows(self, since: str) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        event_windows: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        events = _fetch_all(
+            "events", "id, event_date, start_time, end_time",
+            lambda q: q.eq("status", "active").gte("event_date", since)
+        )
+        if events:
+            windows_by_event = {event["id"]: event_window(event) for event in events}
+            roster = _fetch_all(
+                "event_guest_vehicles", "event_id, plate_number",
+                lambda q: q.in_("event_id", list(windows_by_event))
+            )
+            for row in roster:
+                # Keyed like the scheduler snapshot, which normalizes roster plates
+                event_windows.setdefault(normalize_plate(row["plate_number"]), []).append(
+                    windows_by_event[row["event_id"]]
+                )
+        return event_windows
+
+    def apply_event_snapshot(self, snapshot: Dict):
+        """Replace the event windows with a snapshot published by the event scheduler."""
+        # Freshness counts from when the scheduler built the snapshot, not when it arrived
+        generated_at = _parse_timestamp(snapshot["generated_at"])
+        event_windows: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        for event in snapshot["events"].values():
+            window = (_parse_timestamp(event["start"]), _parse_timestamp(event["end"]))
+            for plate_number in event["plates"]:
+                event_windows.setdefault(plate_number, []).append(window)
+        with self._write_lock:
+            self.events = {plate: IntervalSet(w) for plate, w in event_windows.items()}
+            self.event_snapshot_version = snapshot.get("version")
+            self.event_snapshot_at = generated_at
+        print(f"[*] Applied event snapshot {self.event_snapshot_version}: "
+              f"{len(snapshot['events'])} active events, {len(event_windows)} plates")
+
+    def is_authorized(self, plate_number: str, moment: Optional[datetime] = None) -> bool:
+        moment = moment or datetime.now()
+        if plate_number in self.permanent:
+            return True
+        guest = self.guests.get(plate_number)
+        if guest and guest.contains(moment):
+            return True
+        event = self.events.get(normalize_plate(plate_number))
+        return bool(event and event.contains(moment))
+
+    def add_authorized_plate(self, plate_number: str):
+        """Apply a local insert immediately instead of waiting for the next sync."""
+        with self._write_lock:
+            self.permanent = self.permanent | {plate_number}
+
+    def invalidate(self):
+        """Ask the sync thread to reload now rather than at the next interval."""
+        self._invalidated.set()
+
+    def _sync_loop(self):
+        while True:
+            self._invalidated.wait(self.refresh_interval)
+            self._invalidated.clear()
+            try:
+                self.load()
+            except Exception as e:
+                print(f"Error refreshing authorization index: {e}")
+
+    def start(self):
+        """Load the index and keep it fresh from a background thread."""
+        try:
+            self.load()
+        except Exception as e:
+            print(f"Error loading authorization index, falling back to live queries: {e}")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sync_loop, daemon=True)
+            self._thread.start()
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "permanent_plates": len(self.permanent),
+            "guest_plates": len(self.guests),
+            "event_plates": len(self.events),
+            "event_snapshot_version": self.event_snapshot_version,
+            "event_snapshot_at": self.event_snapshot_at.isoformat() if self.event_snapshot_at else None,
+        }
+
+
+authorization_index = AuthorizationIndex()
+
+
+def is_authorized(plate_number: str) -> bool:
+    """Answer from the in-memory index, or query Supabase if it never loaded."""
+    if authorization_index.ready:
+        return authorization_index.is_authorized(plate_number)
+    return check_authorization(plate_number)
+
+
+def is_authorized_many(plate_numbers: List[str]) -> Dict[str, bool]:
+    """Decide a whole batch of plates with at most one bulk lookup."""
+    if authorization_index.ready:
+        moment = datetime.now()
+        return {plate: authorization_index.is_authorized(plate, moment) for plate in plate_numbers}
+    return check_authorization_many(plate_numbers)
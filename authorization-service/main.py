@@ -1,9 +1,12 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import threading
-from rabbitmq import consume_vehicle_detected
+from rabbitmq import consume_vehicle_detected, consume_event_snapshots
 from supabase_utils import supabase
+from authorization_index import authorization_index
+from tracing import metrics
 
 app = FastAPI()
 
@@ -21,15 +24,27 @@ def start_rabbitmq_consumer():
 
 @app.on_event("startup")
 def startup_event():
+    # Bulk-load the authorization index before the consumer starts deciding plates
+    authorization_index.start()
+
     # Start RabbitMQ consumer in a separate thread to keep FastAPI app responsive
     thread = threading.Thread(target=start_rabbitmq_consumer)
     thread.daemon = True  # Ensure it closes when the main program exits
     thread.start()
 
+    # Event windows are pushed by the security dashboard's event scheduler
+    threading.Thread(target=consume_event_snapshots, daemon=True).start()
+
 @app.get("/")
 def read_root():
     return {"message": "Authorization service is running"}
 
+@app.get("/metrics")
+def get_metrics(format: str = "prometheus"):
+    if format == "json":
+        return metrics.report()
+    return PlainTextResponse(metrics.prometheus("authorization"))
+
 class AuthorizedVehicle(BaseModel):
     plate_number: str
     owner_name: str
@@ -53,6 +68,7 @@ async def add_authorized_vehicle(vehicle: AuthorizedVehicle):
         
         # Insert new vehicle
         result = supabase.table("authorized_vehicles").insert(vehicle.dict()).execute()
+        authorization_index.add_authorized_plate(vehicle.plate_number)
         return result.data[0]
     except HTTPException as he:
         raise he
@@ -74,4 +90,12 @@ async def search_authorized_vehicles(query: str = Query(None, description="Searc
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/authorization-index")
+def get_authorization_index_stats():
+    return authorization_index.stats()
 
+@app.post("/api/authorization-index/refresh")
+def refresh_authorization_index():
+    # Invalidation hook for services that change guest or event tables
+    authorization_index.invalidate()
+    return {"message": "Authorization index refresh scheduled"}
@@ -1,69 +1,137 @@
 import pika
 import json
-from supabase import create_client, Client
-from supabase_utils import check_authorization
+import os
+import time
+import uuid
+from authorization_index import authorization_index, is_authorized_many
+from rabbitmq_publisher import RABBITMQ_HOST, PublishError, publish_many
+from tracing import metrics
 
-def consume_vehicle_detected():
-    connection = pika.BlockingConnection(pika.ConnectionParameters("localhost"))
+# Up to PREFETCH_COUNT unacked detections are buffered client-side; they are
+# decided in micro-batches of BATCH_SIZE, or whatever arrived within BATCH_WAIT.
+PREFETCH_COUNT = int(os.getenv("AUTH_PREFETCH_COUNT", "50"))
+BATCH_SIZE = int(os.getenv("AUTH_BATCH_SIZE", "20"))
+BATCH_WAIT = float(os.getenv("AUTH_BATCH_WAIT_SECONDS", "0.05"))
+REQUIRED_FIELDS = {"plate_number", "timestamp", "filename"}
+
+def consume_vehicle_detected(prefetch_count: int = PREFETCH_COUNT, batch_size: int = BATCH_SIZE,
+                             batch_wait: float = BATCH_WAIT):
+    connection = pika.BlockingConnection(pika.ConnectionParameters(RABBITMQ_HOST))
     channel = connection.channel()
 
     channel.queue_declare(queue="vehicle_detected", durable=True)
+    channel.basic_qos(prefetch_count=max(prefetch_count, batch_size))
+
+    print(" [*] Authorization service is listening for vehicle detections...")
+    batch = []
+    batch_started = None
+    for method, properties, body in channel.consume("vehicle_detected", inactivity_timeout=batch_wait):
+        if method is not None:
+            if not batch:
+                batch_started = time.monotonic()
+            batch.append((method, body))
+            if len(batch) < batch_size and time.monotonic() - batch_started < batch_wait:
+                continue
+        if batch:
+            process_batch(channel, batch)
+            batch = []
+
+def consume_event_snapshots():
+    """Keep the index's event windows in step with the dashboard's event scheduler."""
+    connection = pika.BlockingConnection(pika.ConnectionParameters(RABBITMQ_HOST))
+    channel = connection.channel()
+    # Each instance binds its own queue to the fanout exchange, so every index gets every snapshot;
+    # one missed while down is covered by the scheduler's periodic republish
+    channel.exchange_declare(exchange="event.authorization.snapshot", exchange_type="fanout", durable=True)
+    queue = channel.queue_declare(queue="", exclusive=True).method.queue
+    channel.queue_bind(queue=queue, exchange="event.authorization.snapshot")
 
     def callback(ch, method, properties, body):
-        message = json.loads(body)
-        plate_number = message["plate_number"]
-        print(f" [x] Received {plate_number}")
+        try:
+            authorization_index.apply_event_snapshot(json.loads(body))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f" [!] Dropping malformed event snapshot: {e}")
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+    channel.basic_consume(queue=queue, on_message_callback=callback)
+    print(" [*] Authorization service is listening for event snapshots...")
+    channel.start_consuming()
 
-        # Check if vehicle is authorized
-        is_authorized = check_authorization(plate_number)
+def process_batch(channel, batch):
+    """Decide every detection in the batch together and ack them with one frame."""
+    started = time.time()
+    messages = []  # (delivery tag, message)
+    last_tag = None
+    for method, body in batch:
+        try:
+            message = json.loads(body)
+        except ValueError:
+            message = None
+        if not isinstance(message, dict) or not REQUIRED_FIELDS <= message.keys():
+            print(f" [!] Dropping malformed detection: {body!r}")
+            channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            continue
+        messages.append((method.delivery_tag, message))
+        # Malformed messages are already settled, so the multiple ack/nack stops at the last valid one
+        last_tag = method.delivery_tag
 
+    if not messages:
+        return
+
+    for _, message in messages:
+        metrics.queue_wait(message.get("trace"), "vehicle_detected", started)
+        metrics.mark(message.get("trace"), "auth_start", started)
+    decisions = is_authorized_many([message["plate_number"] for _, message in messages])
+    finished = time.time()
+
+    authorized, unauthorized = [], []  # (delivery tag, result)
+    for tag, message in messages:
+        plate_number = message["plate_number"]
+        print(f" [x] Received {plate_number}")
         result = {
             "plate_number": plate_number,
-            "is_authorized": is_authorized,
+            "is_authorized": decisions[plate_number],
             "timestamp": message["timestamp"],
-            "filename": message["filename"]
+            "filename": message["filename"],
+            "trace": metrics.mark(message.get("trace"), "auth_end", finished)
         }
-
-        if is_authorized:
-            # Publish result to logger
-            publish_authorization_result(result)
+        # Authorized vehicles go to the logger, the rest to manual approval
+        if result["is_authorized"]:
+            authorized.append((tag, result))
         else:
-            # Send unauthorized vehicle to manual approval queue
-            publish_manual_approval_request(result)
-
-        ch.basic_ack(delivery_tag=method.delivery_tag)
-
-
-    channel.basic_consume(queue="vehicle_detected", on_message_callback=callback)
-    print(" [*] Authorization service is listening for vehicle detections...")
-    channel.start_consuming()
-
-def publish_authorization_result(data: dict):
-    connection = pika.BlockingConnection(pika.ConnectionParameters("localhost"))
-    channel = connection.channel()
-
-    channel.queue_declare(queue="vehicle.authorization.result", durable=True)
+            result["request_id"] = approval_request_id(message)
+            unauthorized.append((tag, result))
 
-    channel.basic_publish(
-        exchange="",
-        routing_key="vehicle.authorization.result",
-        body=json.dumps(data),
-        properties=pika.BasicProperties(delivery_mode=2)
-    )
-    print(f" [x] Sent authorization result: {data}")
-    connection.close()
+    published = set()  # delivery tags whose result is already out
+    try:
+        if authorized:
+            _publish_results("vehicle.authorization.result", authorized, published)
+            print(f" [x] Sent {len(authorized)} authorization results")
+        if unauthorized:
+            _publish_results("manual_approval_requests", unauthorized, published)
+            print(f" [x] Sent {len(unauthorized)} unauthorized vehicles to manual approval queue")
+    except Exception as e:
+        # Ack what went out so a redelivery does not log it twice; requeue only the rest
+        print(f" [!] Failed to publish batch, requeueing {len(messages) - len(published)} detections: {e}")
+        for tag, _ in messages:
+            if tag in published:
+                channel.basic_ack(delivery_tag=tag)
+            else:
+                channel.basic_nack(delivery_tag=tag, requeue=True)
+        return
 
-def publish_manual_approval_request(data: dict):
-    connection = pika.BlockingConnection(pika.ConnectionParameters("localhost"))
-    channel = connection.channel()
+    channel.basic_ack(delivery_tag=last_tag, multiple=True)
 
-    channel.queue_declare(queue="manual_approval_requests", durable=True)
+def _publish_results(queue: str, results, published: set):
+    """Publish (delivery tag, result) pairs, adding the tags of those sent to `published`."""
+    try:
+        publish_many(queue, [result for _, result in results])
+    except PublishError as e:
+        published.update(tag for tag, _ in results[:e.sent])
+        raise
+    published.update(tag for tag, _ in results)
 
-    channel.basic_publish(
-        exchange="",
-        routing_key="manual_approval_requests",
-        body=json.dumps(data),
-        properties=pika.BasicProperties(delivery_mode=2)
-    )
-    print(f" [x] Sent unauthorized vehicle to manual approval queue: {data}")
-    connection.close()
+def approval_request_id(message: dict) -> str:
+    """Derived from the detection itself, so a redelivered or republished request keeps its id."""
+    key = f"{message['plate_number']}|{message['timestamp']}|{message['filename']}"
+    return uuid.uuid5(uuid.NAMESPACE_URL, key).hex
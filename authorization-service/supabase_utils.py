@@ -1,6 +1,8 @@
-from datetime import datetime
+from datetime import datetime, date, time, timedelta
 from supabase import create_client, Client
 import os
+import re
+from typing import Dict, List, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,47 +12,79 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Same rule as the dashboard's event_management.normalize_plate, which the event snapshots use
+_PLATE_SEPARATORS = re.compile(r"[\s\-_.]+")
+
+def normalize_plate(plate_number: str) -> str:
+    """Uppercase and join plate groups with hyphens, the format the plate detector sends."""
+    return _PLATE_SEPARATORS.sub("-", plate_number.strip().upper()).strip("-")
+
+def event_window(event: Dict) -> Tuple[datetime, datetime]:
+    """An event's start and end; an end time before the start time means it runs past midnight."""
+    event_date = date.fromisoformat(event["event_date"])
+    start = datetime.combine(event_date, time.fromisoformat(event["start_time"]))
+    end = datetime.combine(event_date, time.fromisoformat(event["end_time"]))
+    return start, end if end > start else end + timedelta(days=1)
+
 def check_authorization(plate_number: str) -> bool:
+    return check_authorization_many([plate_number])[plate_number]
+
+def check_authorization_many(plate_numbers: List[str]) -> Dict[str, bool]:
+    """Bulk version of check_authorization: a fixed number of queries for any batch size."""
+    plates = list(set(plate_numbers))
+    decisions = {plate: False for plate in plates}
+    if not plates:
+        return decisions
     try:
-        # Check in authorized_vehicles table
-        result = supabase.table("authorized_vehicles").select("plate_number").eq("plate_number", plate_number).execute()
-        if result.data:
-            return True
+        result = supabase.table("authorized_vehicles").select("plate_number").in_("plate_number", plates).execute()
+        for row in result.data:
+            decisions[row["plate_number"]] = True
+
+        remaining = [plate for plate in plates if not decisions[plate]]
+        if not remaining:
+            return decisions
 
-        # Check in guest_vehicles table with time validation
         now = datetime.now().isoformat()
-        guest_result = supabase.table("guest_vehicles").select("*") \
-            .eq("plate_number", plate_number) \
+        guest_result = supabase.table("guest_vehicles").select("plate_number") \
+            .in_("plate_number", remaining) \
             .lte("valid_from", now) \
             .gte("valid_until", now) \
             .execute()
+        for row in guest_result.data:
+            decisions[row["plate_number"]] = True
 
-        if guest_result.data:
-            return True
+        remaining = [plate for plate in remaining if not decisions[plate]]
+        if not remaining:
+            return decisions
 
-        # Check for event-based authorization
-        current_date = datetime.now().date().isoformat()
-        current_time = datetime.now().time().isoformat()
-
-        # Query for active events that include this vehicle
+        # Events dated yesterday can still be running past midnight
+        moment = datetime.now()
         event_result = supabase.table("events").select(
-            "id, event_name, event_date, start_time, end_time"
-        ).eq("status", "active").eq("event_date", current_date).execute()
-
-        if event_result.data:
-            # Check if current time is within any active event's time window
-            for event in event_result.data:
-                if event["start_time"] <= current_time <= event["end_time"]:
-                    # Check if vehicle is registered for this event
-                    vehicle_result = supabase.table("event_guest_vehicles").select(
-                        "*"
-                    ).eq("event_id", event["id"]).eq("plate_number", plate_number).execute()
-
-                    if vehicle_result.data:
-                        return True
-
-        return False
-    
+            "id, event_date, start_time, end_time"
+        ).eq("status", "active") \
+            .gte("event_date", (moment.date() - timedelta(days=1)).isoformat()) \
+            .lte("event_date", moment.date().isoformat()) \
+            .execute()
+
+        open_event_ids = []
+        for event in event_result.data:
+            start, end = event_window(event)
+            if start <= moment <= end:
+                open_event_ids.append(event["id"])
+        if open_event_ids:
+            # Rosters hold plates as typed, so both sides are compared normalized
+            wanted: Dict[str, List[str]] = {}
+            for plate in remaining:
+                wanted.setdefault(normalize_plate(plate), []).append(plate)
+            vehicle_result = supabase.table("event_guest_vehicles").select("plate_number") \
+                .in_("event_id", open_event_ids) \
+                .execute()
+            for row in vehicle_result.data:
+                for plate in wanted.get(normalize_plate(row["plate_number"]), ()):
+                    decisions[plate] = True
+
+        return decisions
+
     except Exception as e:
         print(f"Error checking authorization: {e}")
-        return False
+        return decisions
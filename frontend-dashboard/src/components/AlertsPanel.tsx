@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { AlertTriangle } from "lucide-react";
@@ -23,11 +23,25 @@ export function AlertsPanel() {
   const [selectedAlert, setSelectedAlert] = useState<Alert | null>(null);
   const [loading, setLoading] = useState(true);
 
+  const syncToken = useRef<string | null>(null);
+
   const fetchAlerts = async () => {
     try {
-      const response = await fetch('http://localhost:8003/api/alerts');
-      const data = await response.json();
-      setAlerts(data);
+      // After the first load only alerts created or updated since the last sync are fetched
+      const url = syncToken.current
+        ? `http://localhost:8003/api/alerts?since=${encodeURIComponent(syncToken.current)}`
+        : 'http://localhost:8003/api/alerts';
+      const response = await fetch(url);
+      const data: Alert[] = await response.json();
+      const incremental = syncToken.current !== null;
+      syncToken.current = response.headers.get('X-Sync-Token') ?? syncToken.current;
+      if (!incremental) {
+        setAlerts(data);
+        return;
+      }
+      if (data.length > 0) {
+        mergeAlerts(data);
+      }
     } catch (error) {
       console.error('Error fetching alerts:', error);
     } finally {
@@ -35,11 +49,26 @@ export function AlertsPanel() {
     }
   };
 
+  const mergeAlerts = (changed: Alert[]) => {
+    setAlerts(prev => {
+      const byId = new Map(changed.map(alert => [alert.id, alert]));
+      const unchanged = prev.filter(alert => !byId.has(alert.id));
+      return [...byId.values(), ...unchanged].sort(
+        (a, b) => new Date(b.timestamp).getTime() - new Date(a.timestamp).getTime()
+      );
+    });
+  };
+
   useEffect(() => {
     fetchAlerts();
-    // Refresh alerts every 30 seconds
-    const interval = setInterval(fetchAlerts, 30000);
-    return () => clearInterval(interval);
+    // New and updated alerts are pushed by the logger service; every (re)connect
+    // runs an incremental sync to pick up anything missed while disconnected
+    const source = new EventSource('http://localhost:8003/api/stream');
+    source.onopen = () => fetchAlerts();
+    source.addEventListener('alert', (event) => {
+      mergeAlerts([JSON.parse((event as MessageEvent).data)]);
+    });
+    return () => source.close();
   }, []);
 
   const handleDispatchTeam = async (alertId: string) => {
@@ -16,23 +16,35 @@ interface VehicleLog {
 export function SearchLogs() {
   const [searchQuery, setSearchQuery] = useState("");
   const [logs, setLogs] = useState<VehicleLog[]>([]);
-  const [filteredLogs, setFilteredLogs] = useState<VehicleLog[]>([]);
+  // The plate search the loaded pages were fetched for; "Load more" keeps using it
+  const [plateSearch, setPlateSearch] = useState("");
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   useEffect(() => {
     fetchLogs();
   }, []);
 
-  const fetchLogs = async () => {
+  const fetchLogs = async (cursor?: string, search: string = plateSearch) => {
     try {
-      const response = await fetch("http://localhost:8003/api/vehicles/logs");
+      const params = new URLSearchParams();
+      if (search) {
+        params.set("search", search);
+      }
+      if (cursor) {
+        params.set("cursor", cursor);
+      }
+      const query = params.toString();
+      const response = await fetch(
+        query ? `http://localhost:8003/api/vehicles/logs?${query}` : "http://localhost:8003/api/vehicles/logs"
+      );
       if (!response.ok) {
         throw new Error("Failed to fetch logs");
       }
-      const data = await response.json();
-      setLogs(data);
-      setFilteredLogs(data);
+      const data: VehicleLog[] = await response.json();
+      setLogs(cursor ? [...logs, ...data] : data);
+      setNextCursor(response.headers.get("X-Next-Cursor"));
       setLoading(false);
     } catch (err) {
       console.error("Error fetching logs:", err);
@@ -41,18 +53,12 @@ export function SearchLogs() {
     }
   };
 
+  // Searching asks the logger for plates containing the query and starts again from the first page
   const handleSearch = () => {
-    if (!searchQuery.trim()) {
-      setFilteredLogs(logs);
-      return;
-    }
-    
-    const query = searchQuery.toLowerCase().trim();
-    const results = logs.filter(
-      (log) => log.plate_number.toLowerCase().includes(query)
-    );
-    
-    setFilteredLogs(results);
+    const search = searchQuery.trim();
+    setPlateSearch(search);
+    setNextCursor(null);
+    fetchLogs(undefined, search);
   };
 
   if (loading) {
@@ -113,8 +119,8 @@ export function SearchLogs() {
             </tr>
           </thead>
           <tbody className="divide-y divide-border">
-            {filteredLogs.length > 0 ? (
-              filteredLogs.map((log) => (
+            {logs.length > 0 ? (
+              logs.map((log) => (
                 <tr key={log.id} className="hover:bg-secondary/20">
                   <td className="px-4 py-3 text-sm">
                     <div className="flex items-center gap-2">
@@ -162,6 +168,14 @@ export function SearchLogs() {
           </tbody>
         </table>
       </div>
+
+      {nextCursor && (
+        <div className="flex justify-center">
+          <Button variant="outline" onClick={() => fetchLogs(nextCursor)}>
+            Load more
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
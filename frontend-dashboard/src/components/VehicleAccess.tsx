@@ -6,6 +6,7 @@ import { Car, Check, X, Edit2, Save } from "lucide-react";
 import { Input } from "@/components/ui/input";
 
 interface Vehicle {
+  request_id: string;
   plate_number: string;
   is_authorized: boolean;
   timestamp: string;
@@ -33,6 +34,22 @@ export function VehicleAccess() {
         setError("Failed to fetch vehicle data.");
         setLoading(false);
       });
+
+    // Pending vehicles are pushed by the dashboard service as they arrive or are handled
+    const source = new EventSource("http://localhost:8004/api/stream");
+    source.addEventListener("pending_added", (event) => {
+      const vehicle: Vehicle = JSON.parse((event as MessageEvent).data);
+      // A redelivered request is announced again with the same id
+      setVehicles((prev) =>
+        prev.some((v) => v.request_id === vehicle.request_id) ? prev : [...prev, vehicle]
+      );
+    });
+    source.addEventListener("pending_removed", (event) => {
+      // Only the handled request goes; other requests for the same plate stay queued
+      const { request_id } = JSON.parse((event as MessageEvent).data);
+      setVehicles((prev) => prev.filter((v) => v.request_id !== request_id));
+    });
+    return () => source.close();
   }, []);
 
   const handleApprove = async (plateNumber: string) => {
@@ -41,8 +58,8 @@ export function VehicleAccess() {
         method: 'POST',
         redirect: 'follow'
       });
-      
-      setVehicles((prev) => prev.filter((v) => v.plate_number !== plateNumber));
+
+      // The resolved request leaves the list through its "pending_removed" event
       if (selectedVehicle === plateNumber) {
         setSelectedVehicle(null);
       }
@@ -58,8 +75,8 @@ export function VehicleAccess() {
         method: 'POST',
         redirect: 'follow'
       });
-      
-      setVehicles((prev) => prev.filter((v) => v.plate_number !== plateNumber));
+
+      // The resolved request leaves the list through its "pending_removed" event
       if (selectedVehicle === plateNumber) {
         setSelectedVehicle(null);
       }
@@ -172,7 +189,7 @@ export function VehicleAccess() {
         <div className="lg:col-span-7 flex flex-col gap-4">
           {vehicles.map((vehicle) => (
             <div
-              key={vehicle.plate_number}
+              key={vehicle.request_id}
               className={`vehicle-item cursor-pointer p-4 border rounded-lg ${
                 selectedVehicle === vehicle.plate_number ? "border-primary" : ""
               }`}
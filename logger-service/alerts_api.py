@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List, Optional
 from datetime import datetime
 from supabase_utils import supabase
 from pydantic import BaseModel
+from event_stream import broadcaster
+from pagination import DEFAULT_LIMIT, MAX_LIMIT, apply_keyset, encode_cursor, fetch_page
 
 router = APIRouter()
 
@@ -10,15 +12,50 @@ class AlertUpdate(BaseModel):
     status: Optional[str] = None
     team_dispatched: Optional[bool] = None
 
+def _build_alerts_query(status: Optional[str]):
+    def build_query():
+        query = supabase.table("surveillance_alerts").select("*")
+        if status:
+            query = query.eq("status", status)
+        return query
+    return build_query
+
+def _latest_sync_token(status: Optional[str]) -> Optional[str]:
+    """Token for the most recently created or updated alert; doubles as the ETag."""
+    rows = apply_keyset(_build_alerts_query(status)(), None, "updated_at").limit(1).execute().data
+    return encode_cursor(rows[0], "updated_at") if rows else None
+
 @router.get("/alerts")
-async def get_alerts(status: Optional[str] = None):
-    query = supabase.table("surveillance_alerts").select("*").order("timestamp", desc=True)
-    
-    if status:
-        query = query.eq("status", status)
-    
-    response = query.execute()
-    return response.data
+async def get_alerts(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    since: Optional[str] = Query(None, description="X-Sync-Token from the previous sync"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous history page"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+):
+    build_query = _build_alerts_query(status)
+
+    if since:
+        # Incremental sync: only alerts created or updated after the token, oldest first
+        rows, next_cursor = fetch_page(build_query, since, limit, "updated_at", desc=False)
+        response.headers["X-Sync-Token"] = encode_cursor(rows[-1], "updated_at") if rows else since
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return rows
+
+    sync_token = _latest_sync_token(status)
+    etag = f'W/"{sync_token}:{cursor}:{limit}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    rows, next_cursor = fetch_page(build_query, cursor, limit)
+    response.headers["ETag"] = etag
+    if sync_token:
+        response.headers["X-Sync-Token"] = sync_token
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
 
 @router.get("/alerts/{alert_id}")
 async def get_alert(alert_id: str):
@@ -32,6 +69,7 @@ async def get_alert(alert_id: str):
 @router.patch("/alerts/{alert_id}")
 async def update_alert(alert_id: str, update: AlertUpdate):
     update_data = update.dict(exclude_unset=True)
+    update_data["updated_at"] = datetime.now().isoformat()
     
     if update_data.get("status") == "resolved":
         update_data["resolution_time"] = datetime.now().isoformat()
@@ -43,4 +81,5 @@ async def update_alert(alert_id: str, update: AlertUpdate):
     if not response.data:
         raise HTTPException(status_code=404, detail="Alert not found")
     
+    broadcaster.publish("alert", response.data[0])
     return response.data[0] 
\ No newline at end of file
@@ -0,0 +1,72 @@
+# event_stream.py
+# Shared by the logger and security-dashboard services; keep the copies identical.
+import asyncio
+import json
+import threading
+from typing import AsyncIterator
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+KEEPALIVE_SECONDS = 15
+CLIENT_QUEUE_SIZE = 100  # events buffered per client before the oldest are dropped
+
+
+class EventBroadcaster:
+    """Fans events out from RabbitMQ consumer threads to every connected SSE client.
+
+    Each event is serialized once; clients get their own bounded queue on the
+    server's event loop, so a slow viewer loses old events instead of
+    holding up the consumer or the other viewers.
+    """
+
+    def __init__(self, queue_size: int = CLIENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event: str, data):
+        """Send an event to all clients; safe to call from any thread."""
+        message = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, message)
+            except RuntimeError:
+                # The client's event loop is already closed
+                pass
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, message: str):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    async def _stream(self, request: Request) -> AsyncIterator[str]:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def response(self, request: Request) -> StreamingResponse:
+        return StreamingResponse(
+            self._stream(request),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscribers)
+
+
+broadcaster = EventBroadcaster()
@@ -0,0 +1,78 @@
+# log_buffer.py
+import os
+import time
+from typing import Callable, List, Optional
+from postgrest.exceptions import APIError
+from supabase_utils import insert_rows
+
+FLUSH_ROWS = int(os.getenv("LOG_FLUSH_ROWS", "100"))
+FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", "1.0"))
+
+
+class LogBuffer:
+    """Rows waiting for one multi-row insert, plus the delivery tag that acks them.
+
+    The consumer only acks up to last_tag after flush() returns, so a crash
+    before the insert commits leaves the messages on the queue for redelivery.
+    """
+
+    def __init__(self, table: str, max_rows: int = FLUSH_ROWS, max_delay: float = FLUSH_SECONDS,
+                 on_flush: Optional[Callable[[List[dict]], None]] = None):
+        self.table = table
+        self.on_flush = on_flush
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.rows: List[dict] = []
+        self.tags: List[int] = []
+        self.first_added: Optional[float] = None
+
+    @property
+    def last_tag(self) -> Optional[int]:
+        return self.tags[-1] if self.tags else None
+
+    def add(self, row: dict, delivery_tag: int):
+        if not self.rows:
+            self.first_added = time.monotonic()
+        self.rows.append(row)
+        self.tags.append(delivery_tag)
+
+    def due(self) -> bool:
+        if not self.rows:
+            return False
+        return len(self.rows) >= self.max_rows or time.monotonic() - self.first_added >= self.max_delay
+
+    def flush(self) -> int:
+        """Insert the buffered rows and return the delivery tag to ack them with."""
+        response = insert_rows(self.table, self.rows)
+        print(f"[x] Flushed {len(self.rows)} rows to {self.table}")
+        if self.on_flush:
+            self.on_flush(response.data or [])
+        return self.clear()[-1]
+
+    def flush_each(self, on_inserted: Callable[[int], None], on_rejected: Callable[[int, APIError], None]):
+        """Insert the rows one at a time after the database refused the batch.
+
+        Rows the database rejects are handed to on_rejected instead of being
+        retried. Any other error (the database is unreachable) propagates and
+        leaves the rows not yet settled in the buffer.
+        """
+        while self.rows:
+            try:
+                response = insert_rows(self.table, [self.rows[0]])
+            except APIError as e:
+                on_rejected(self.tags[0], e)
+            else:
+                if self.on_flush:
+                    self.on_flush(response.data or [])
+                on_inserted(self.tags[0])
+            self.rows.pop(0)
+            self.tags.pop(0)
+        self.first_added = None
+
+    def clear(self) -> List[int]:
+        """Empty the buffer and return the delivery tags it held."""
+        tags = self.tags
+        self.rows = []
+        self.tags = []
+        self.first_added = None
+        return tags
@@ -1,10 +1,24 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, Response, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from datetime import datetime
 from typing import Optional
 import threading
 from fastapi.middleware.cors import CORSMiddleware
 from rabbitmq_listener import consume_vehicle_authorized, consume_surveillance_alerts
 from supabase_utils import supabase
 from alerts_api import router as alerts_router
+from event_stream import broadcaster
+from tracing import metrics
+from pagination import (
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    select_columns,
+    like_escape,
+    fetch_page,
+    iter_rows,
+    ndjson_lines,
+    csv_lines
+)
 
 app = FastAPI()
 
@@ -15,11 +29,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Sync-Token", "ETag"],
 )
 
 # Include alerts router
 app.include_router(alerts_router, prefix="/api")
 
+@app.get("/metrics")
+def get_metrics(format: str = "prometheus"):
+    if format == "json":
+        return metrics.report()
+    return PlainTextResponse(metrics.prometheus("logger"))
+
+@app.get("/api/metrics/gate-latency")
+def get_gate_latency():
+    # End-to-end p50/p95/p99 from frame capture to the committed log row
+    report = metrics.report()
+    return {
+        "end_to_end": report.get("gate_latency_seconds", {}).get("end_to_end"),
+        "stages": report.get("stage_latency_seconds", {}),
+        "queue_wait": report.get("queue_wait_seconds", {}),
+    }
+
 @app.on_event("startup")
 def startup_event():
     threading.Thread(target=consume_vehicle_authorized, daemon=True).start()
@@ -29,16 +60,61 @@ def startup_event():
 def read_root():
     return {"message": "Logger service is running"}
 
+@app.get("/api/stream")
+async def stream_events(request: Request):
+    # Server-sent "alert" and "vehicle_log" events, pushed as the consumers commit them
+    return broadcaster.response(request)
+
+VEHICLE_LOG_COLUMNS = ["id", "plate_number", "status", "timestamp", "security_clear"]
+
 @app.get("/api/vehicles/logs")
-async def get_vehicle_logs(plate_number: Optional[str] = Query(None, description="Filter logs by plate number")):
-    try:
-        query = supabase.table("vehicle_logs").select("*").order("timestamp", desc=True)
-        
+async def get_vehicle_logs(
+    response: Response,
+    plate_number: Optional[str] = Query(None, description="Filter logs by plate number"),
+    search: Optional[str] = Query(None, description="Case-insensitive part of a plate number"),
+    status: Optional[str] = Query(None, description="Filter logs by status"),
+    from_time: Optional[datetime] = Query(None, alias="from", description="Only logs at or after this time"),
+    to_time: Optional[datetime] = Query(None, alias="to", description="Only logs at or before this time"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    format: str = Query("json", pattern="^(json|ndjson|csv)$", description="json page, or a streamed ndjson/csv export"),
+):
+    selected = select_columns(columns, VEHICLE_LOG_COLUMNS)
+
+    def build_query():
+        query = supabase.table("vehicle_logs").select(selected)
         if plate_number:
             query = query.eq("plate_number", plate_number)
-            
-        response = query.execute()
-        return response.data
+        if search and search.strip():
+            query = query.ilike("plate_number", f"%{like_escape(search.strip())}%")
+        if status:
+            query = query.eq("status", status)
+        if from_time:
+            query = query.gte("timestamp", from_time.isoformat())
+        if to_time:
+            query = query.lte("timestamp", to_time.isoformat())
+        return query
+
+    if format == "ndjson":
+        return StreamingResponse(ndjson_lines(iter_rows(build_query)), media_type="application/x-ndjson")
+    if format == "csv":
+        csv_columns = VEHICLE_LOG_COLUMNS if selected == "*" else selected.split(",")
+        return StreamingResponse(
+            csv_lines(iter_rows(build_query), csv_columns),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=vehicle_logs.csv"},
+        )
+
+    try:
+        rows, next_cursor = fetch_page(build_query, cursor, limit)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         print("Error fetching vehicle logs:", e)
-        return {"error": "Failed to fetch vehicle logs"}, 500
+        raise HTTPException(status_code=500, detail="Failed to fetch vehicle logs")
+
+    # The body stays a plain list for existing clients; the cursor rides in a header
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
@@ -0,0 +1,83 @@
+# pagination.py
+import base64
+import csv
+import io
+import json
+from typing import Iterator, List, Optional, Tuple
+from fastapi import HTTPException
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+EXPORT_PAGE_SIZE = 1000
+
+def encode_cursor(row: dict, column: str = "timestamp") -> str:
+    """Opaque keyset cursor pointing just past the given (column, id) row."""
+    raw = json.dumps([row[column], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(timestamp), str(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def apply_keyset(query, cursor: Optional[str], column: str = "timestamp", desc: bool = True):
+    """Order by (column, id) and continue strictly after the cursor row."""
+    query = query.order(column, desc=desc).order("id", desc=desc)
+    if cursor:
+        value, row_id = decode_cursor(cursor)
+        op = "lt" if desc else "gt"
+        query = query.or_(f'{column}.{op}."{value}",and({column}.eq."{value}",id.{op}."{row_id}")')
+    return query
+
+def select_columns(columns: Optional[str], allowed: List[str]) -> str:
+    """Validate a comma-separated column list; timestamp and id are always kept for the cursor."""
+    if not columns:
+        return "*"
+    requested = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in requested if c not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+    for required in ("id", "timestamp"):
+        if required not in requested:
+            requested.append(required)
+    return ",".join(requested)
+
+def like_escape(text: str) -> str:
+    """Escape LIKE wildcards so user text is matched literally."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def fetch_page(build_query, cursor: Optional[str], limit: int,
+               column: str = "timestamp", desc: bool = True) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one page and the cursor for the next one (None on the last page)."""
+    rows = apply_keyset(build_query(), cursor, column, desc).limit(limit + 1).execute().data
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1], column)
+    return rows, None
+
+def iter_rows(build_query) -> Iterator[dict]:
+    """Walk the whole result set page by page, for streamed exports."""
+    cursor = None
+    while True:
+        rows, cursor = fetch_page(build_query, cursor, EXPORT_PAGE_SIZE)
+        yield from rows
+        if cursor is None:
+            return
+
+def ndjson_lines(rows: Iterator[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+def csv_lines(rows: Iterator[dict], columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
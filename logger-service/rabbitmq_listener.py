@@ -1,36 +1,93 @@
 import pika
 import json
-from supabase_utils import log_vehicle, log_surveillance_alert
-import threading
+import os
+import time
+from supabase_utils import vehicle_log_row, surveillance_alert_row
+from postgrest.exceptions import APIError
+from log_buffer import LogBuffer, FLUSH_ROWS, FLUSH_SECONDS
+from event_stream import broadcaster
+from tracing import metrics
 
-def consume_vehicle_authorized():
-    connection = pika.BlockingConnection(pika.ConnectionParameters("localhost"))
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "localhost")
+RETRY_DELAY = 2  # seconds to wait before requeueing a batch whose insert failed
+# Alerts are rare and a guard is waiting on them, so flush them sooner than logs
+ALERT_FLUSH_SECONDS = float(os.getenv("ALERT_FLUSH_SECONDS", "0.1"))
+
+def _broadcast(event: str):
+    def on_flush(rows):
+        for row in rows:
+            broadcaster.publish(event, row)
+    return on_flush
+
+def _consume_buffered(queue: str, table: str, to_row, event: str, max_delay: float = FLUSH_SECONDS):
+    """Consume a queue into a LogBuffer, acking each batch only once it is inserted."""
+    connection = pika.BlockingConnection(pika.ConnectionParameters(RABBITMQ_HOST))
     channel = connection.channel()
 
-    channel.queue_declare(queue="vehicle.authorization.result", durable=True)
+    channel.queue_declare(queue=queue, durable=True)
+    # The broker must be allowed to hand us a full batch before any ack
+    channel.basic_qos(prefetch_count=FLUSH_ROWS * 2)
 
-    def callback(ch, method, properties, body):
-        data = json.loads(body)
-        print(f"[x] Received vehicle authorization data: {data}")
-        log_vehicle(data["plate_number"], data.get("status", "entered"), data.get("security_clear", True))
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+    # Inserted rows (with their ids) are pushed to stream clients once committed
+    buffer = LogBuffer(table, max_delay=max_delay, on_flush=_broadcast(event))
+    traces = {}  # delivery tag -> trace context, stamped "logged" once its row is inserted
 
-    channel.basic_consume(queue="vehicle.authorization.result", on_message_callback=callback)
-    print("[*] Waiting for vehicle authorization results...")
-    channel.start_consuming()
+    def on_inserted(tag):
+        channel.basic_ack(delivery_tag=tag)
+        metrics.mark(traces.pop(tag, None), "logged")
 
-def consume_surveillance_alerts():
-    connection = pika.BlockingConnection(pika.ConnectionParameters("localhost"))
-    channel = connection.channel()
+    def on_rejected(tag, error):
+        # Dead-lettered (or dropped) so one bad row cannot block the queue
+        print(f"[!] {table} rejected a row, dropping its message: {error}")
+        channel.basic_nack(delivery_tag=tag, requeue=False)
+        traces.pop(tag, None)
 
-    channel.queue_declare(queue="surveillance.alerts", durable=True)
+    for method, properties, body in channel.consume(queue, inactivity_timeout=max_delay / 4):
+        if method is not None:
+            try:
+                data = json.loads(body)
+                buffer.add(to_row(data), method.delivery_tag)
+            except (ValueError, KeyError, AttributeError) as e:
+                print(f"[!] Dropping malformed message from {queue}: {body!r} ({e})")
+                channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+                continue
+            if data.get("trace"):
+                metrics.queue_wait(data["trace"], queue)
+                traces[method.delivery_tag] = data["trace"]
 
-    def callback(ch, method, properties, body):
-        data = json.loads(body)
-        print(f"[x] Received surveillance alert: {data}")
-        log_surveillance_alert(data)
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        if buffer.due():
+            try:
+                try:
+                    tags = list(buffer.tags)
+                    channel.basic_ack(delivery_tag=buffer.flush(), multiple=True)
+                    logged = time.time()
+                    for tag in tags:
+                        metrics.mark(traces.pop(tag, None), "logged", logged)
+                except APIError as e:
+                    # The database refused the batch; settle it row by row to isolate the bad rows
+                    print(f"[!] {table} rejected a batch of {len(buffer.rows)} rows, retrying row by row: {e}")
+                    buffer.flush_each(on_inserted, on_rejected)
+            except Exception as e:
+                print(f"[!] Error inserting into {table}, requeueing {len(buffer.rows)} messages: {e}")
+                time.sleep(RETRY_DELAY)
+                tags = buffer.clear()
+                if tags:
+                    channel.basic_nack(delivery_tag=tags[-1], multiple=True, requeue=True)
+                for tag in tags:
+                    traces.pop(tag, None)
 
-    channel.basic_consume(queue="surveillance.alerts", on_message_callback=callback)
+def _vehicle_row(data: dict) -> dict:
+    print(f"[x] Received vehicle authorization data: {data}")
+    return vehicle_log_row(data["plate_number"], data.get("status", "entered"), data.get("security_clear", True))
+
+def _alert_row(data: dict) -> dict:
+    print(f"[x] Received surveillance alert: {data}")
+    return surveillance_alert_row(data)
+
+def consume_vehicle_authorized():
+    print("[*] Waiting for vehicle authorization results...")
+    _consume_buffered("vehicle.authorization.result", "vehicle_logs", _vehicle_row, "vehicle_log")
+
+def consume_surveillance_alerts():
     print("[*] Waiting for surveillance alerts...")
-    channel.start_consuming()
+    _consume_buffered("surveillance.alerts", "surveillance_alerts", _alert_row, "alert", ALERT_FLUSH_SECONDS)
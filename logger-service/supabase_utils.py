@@ -2,6 +2,7 @@ from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
 from datetime import datetime
+from typing import List
 
 load_dotenv()
 
@@ -10,25 +11,36 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+def vehicle_log_row(plate_number: str, status: str, security_clear: bool) -> dict:
+    return {
+        "plate_number": plate_number,
+        "status": status,
+        "security_clear": security_clear
+    }
+
+def surveillance_alert_row(alert_data: dict) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "type": alert_data.get("type"),
+        "label": alert_data.get("label"),
+        "confidence": alert_data.get("confidence"),
+        "location": alert_data.get("location"),
+        "timestamp": now,
+        "updated_at": now
+    }
+
+def insert_rows(table: str, rows: List[dict]):
+    """Insert many rows in a single request; raises so callers can retry."""
+    return supabase.table(table).insert(rows).execute()
+
 def log_vehicle(plate_number: str, status: str, security_clear: bool):
     try:
         # Insert log entry into the Supabase database
-        response = supabase.table("vehicle_logs").insert({
-            "plate_number": plate_number,
-            "status": status,
-            "security_clear": security_clear
-        }).execute()
+        response = insert_rows("vehicle_logs", [vehicle_log_row(plate_number, status, security_clear)])
         print("Log inserted:", response)
     except Exception as e:
         print("Error logging vehicle:", e)
 
 
 def log_surveillance_alert(alert_data: dict):
-    supabase.table("surveillance_alerts").insert({
-        "type": alert_data.get("type"),
-        "label": alert_data.get("label"),
-        "confidence": alert_data.get("confidence"),
-        "location": alert_data.get("location"),
-        "timestamp": datetime.now().isoformat()
-    }).execute()
-
+    insert_rows("surveillance_alerts", [surveillance_alert_row(alert_data)])
@@ -0,0 +1,264 @@
+# cameras.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Union
+import cv2
+from detection import locate_plates, read_plates
+from dispatcher import dispatcher
+from motion_gate import MotionGate
+from snapshot_store import snapshot_store
+from pipeline import CapturedFrame, FrameBroadcast, FrameSlot, StageStats
+from plate_tracker import PlateTracker
+from tracing import metrics, new_trace
+
+# "id=source" pairs; a source is a device index, an RTSP URL or a video file
+CAMERA_SOURCES = os.getenv("CAMERA_SOURCES", "default=0")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+
+reading_window = 10  # seconds
+cooldown_period = 10  # seconds
+notification_cooldown = 30  # seconds between notifications for the same plate
+overlay_max_age = 0.5  # seconds a plate box stays on screen after its frame
+
+# Cascade and OCR work from every camera shares one pool sized to the machine
+ocr_pool = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+
+
+class CameraState:
+    """Reading-window and notification state for one camera."""
+
+    __slots__ = (
+        "tracker", "current_plate", "last_detection_time", "is_reading",
+        "reading_start_time", "last_snapshot", "last_sent_plate", "last_sent_time",
+        "latest_detections",
+    )
+
+    def __init__(self):
+        self.tracker = PlateTracker()
+        self.current_plate: Optional[str] = None
+        self.last_detection_time: Optional[float] = None
+        self.is_reading = False
+        self.reading_start_time: Optional[float] = None
+        self.last_snapshot: Optional[str] = None
+        self.last_sent_plate: Optional[str] = None
+        self.last_sent_time: Optional[float] = None
+        self.latest_detections = (0.0, [])
+
+    def window_status(self, now):
+        """Overlay text for the reading-window state machine, or None between windows."""
+        if self.last_detection_time and (now - self.last_detection_time) < cooldown_period:
+            return f"Cooldown: {int(cooldown_period - (now - self.last_detection_time))}s", (0, 0, 255)
+        if self.is_reading and (now - self.reading_start_time) < reading_window:
+            return f"Reading: {int(reading_window - (now - self.reading_start_time))}s", (0, 255, 0)
+        return None
+
+    def advance_window(self, now):
+        """Move the reading-window state machine to `now`; returns (phase, finished_plate)."""
+        # Check if we're in cooldown period
+        if self.last_detection_time and (now - self.last_detection_time) < cooldown_period:
+            return "cooldown", None
+        # Check if we're in reading window
+        if self.is_reading:
+            if (now - self.reading_start_time) < reading_window:
+                return "reading", None
+            # Reading window ended, process results
+            return "finished", self.finish_window(now, self.tracker.best_plate())
+        # Start new reading window
+        self.is_reading = True
+        self.reading_start_time = now
+        self.tracker = PlateTracker()
+        return "started", None
+
+    def finish_window(self, now, plate):
+        """Close the reading window on `plate`, either at timeout or once the vote is decisive."""
+        self.current_plate = plate
+        self.is_reading = False
+        self.last_detection_time = now
+        return plate
+
+
+class Camera:
+    """One video source with its own capture, detection and encode threads."""
+
+    def __init__(self, camera_id: str, source: Union[int, str]):
+        self.camera_id = camera_id
+        self.source = source
+        self.state = CameraState()
+        self.raw_frames = FrameSlot()
+        self.detection_frames = FrameSlot()
+        self.broadcast = FrameBroadcast()
+        self.capture_stats = StageStats("capture")
+        self.detection_stats = StageStats("detection")
+        self.encode_stats = StageStats("encode")
+        self.motion_gate = MotionGate()
+        self.stopped = threading.Event()
+
+    def start(self):
+        for stage in (self.capture_loop, self.detection_loop, self.encode_loop):
+            threading.Thread(target=stage, name=f"{self.camera_id}-{stage.__name__}", daemon=True).start()
+
+    def capture_loop(self):
+        """Capture stage: read the camera as fast as it delivers and publish the newest frame."""
+        capture = cv2.VideoCapture(self.source)
+        while True:
+            started = time.perf_counter()
+            success, frame = capture.read()
+            if not success:
+                break
+            captured = CapturedFrame(frame, time.time(), started)
+            self.raw_frames.put(captured)
+            self.detection_frames.put(captured)
+            self.capture_stats.record(started)
+        capture.release()
+        self.stopped.set()
+        print(f"Camera {self.camera_id} stopped delivering frames")
+
+    def detection_loop(self):
+        """Detection stage: always works on the newest frame, skipping any that went stale."""
+        state = self.state
+        while not self.stopped.is_set():
+            _, captured = self.detection_frames.take(timeout=1.0)
+            if captured is None:
+                continue
+            started = time.perf_counter()
+            # Runs on every frame so the motion baseline stays current
+            moving = self.motion_gate.should_detect(captured.image)
+            phase, finished_plate = state.advance_window(captured.timestamp)
+
+            if phase == "reading" and moving:
+                finished_plate = self.read_frame(captured)
+                if finished_plate:
+                    phase = "finished"
+            if phase == "finished" and finished_plate:
+                # The gate-latency trace starts at the capture of the frame that settled the plate
+                trace = metrics.mark(new_trace(capture=captured.timestamp), "ocr_done")
+                # Save snapshot when plate is detected
+                filename, written = self.save_snapshot(captured.image, finished_plate)
+                print(filename)
+                # Send plate number to main backend
+                self.send_plate_to_backend(finished_plate, filename, written, trace)
+            self.detection_stats.record(started, captured.perf)
+
+    def read_frame(self, captured):
+        """Detect and track plates in one frame, OCR'ing only tracks whose vote is still open.
+
+        Returns the plate if this frame made a track's vote decisive.
+        """
+        state = self.state
+        boxes = ocr_pool.submit(locate_plates, captured.image).result()
+        tracks = state.tracker.update(boxes)
+
+        unsettled = [i for i, track in enumerate(tracks) if not track.converged]
+        readings = read_plates(captured.image, [boxes[i] for i in unsettled])
+        for i, (plate_text, confidence) in zip(unsettled, readings):
+            if plate_text and confidence > 0.5:
+                tracks[i].add_reading(plate_text, confidence)
+
+        found = []
+        for (x, y, w, h), track in zip(boxes, tracks):
+            plate_text, share = track.leader
+            if plate_text:
+                found.append((x, y, w, h, plate_text, share))
+        state.latest_detections = (captured.timestamp, found)
+
+        decisive = state.tracker.decisive()
+        if decisive and state.is_reading:
+            return state.finish_window(captured.timestamp, decisive.leader[0])
+        return None
+
+    def encode_loop(self):
+        """Encoder stage: annotate the newest frame with the latest results and JPEG-encode it."""
+        seq = 0
+        while not self.stopped.is_set():
+            # Nothing to encode for while no guard station has the feed open
+            if not self.broadcast.wait_for_viewers(timeout=1.0):
+                continue
+            seq, captured = self.raw_frames.wait_newer(seq, timeout=1.0)
+            if captured is None:
+                continue
+            started = time.perf_counter()
+            display_frame = captured.image.copy()
+            self.draw_overlay(display_frame, time.time())
+            _, buffer = cv2.imencode('.jpg', display_frame)
+            self.broadcast.publish(buffer.tobytes())
+            self.encode_stats.record(started, captured.perf)
+
+    def draw_overlay(self, display_frame, now):
+        status = self.state.window_status(now)
+        if status:
+            cv2.putText(display_frame, status[0], (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, status[1], 2)
+
+        # Only draw plate boxes while they still describe what is on screen
+        detected_at, plates = self.state.latest_detections
+        if now - detected_at > overlay_max_age:
+            return
+        for (x, y, w, h, plate_text, _) in plates:
+            cv2.rectangle(display_frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+            text_size = cv2.getTextSize(plate_text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
+            cv2.rectangle(display_frame, (x, y-30), (x+text_size[0], y), (0, 255, 0), -1)
+            cv2.putText(display_frame, plate_text, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.8, (255, 255, 255), 2)
+
+    def save_snapshot(self, frame, plate_text):
+        """Store the snapshot off-thread; returns (path, write future)."""
+        filename, written = snapshot_store.save(frame, plate_text)
+        self.state.last_snapshot = filename
+        return filename, written
+
+    def send_plate_to_backend(self, plate_number, filename, snapshot_written=None, trace=None):
+        state = self.state
+        current_time = time.time()
+
+        # Format plate number by replacing spaces with hyphens
+        formatted_plate = plate_number.replace(" ", "-")
+
+        # Check if we should send this plate number
+        if (formatted_plate != state.last_sent_plate or
+            not state.last_sent_time or
+            (current_time - state.last_sent_time) > notification_cooldown):
+            # Delivery (with retries and spooling) happens on the dispatcher thread
+            payload = {"plate_number": formatted_plate, "filename": filename}
+            if trace:
+                payload["trace"] = trace
+            dispatcher.submit(payload, wait_for=snapshot_written)
+            state.last_sent_plate = formatted_plate
+            state.last_sent_time = current_time
+
+    def stats(self) -> dict:
+        return {
+            "source": str(self.source),
+            "running": not self.stopped.is_set(),
+            "capture": self.capture_stats.snapshot(),
+            "detection": {
+                **self.detection_stats.snapshot(),
+                "queue_depth": self.detection_frames.depth,
+                "dropped_frames": self.detection_frames.dropped,
+            },
+            "motion_gate": self.motion_gate.stats(),
+            "encode": {**self.encode_stats.snapshot(), "viewers": self.broadcast.viewers},
+        }
+
+
+def parse_sources(spec: str) -> Dict[str, Union[int, str]]:
+    """Parse "gate-a=0,gate-b=rtsp://..." into {camera_id: source}."""
+    sources = {}
+    for index, entry in enumerate(part.strip() for part in spec.split(",") if part.strip()):
+        camera_id, separator, source = entry.partition("=")
+        # A bare URL may itself contain "=", so only treat a plain name as an id
+        if not separator or ":" in camera_id or "/" in camera_id:
+            camera_id, source = f"camera{index}", entry
+        source = source.strip()
+        sources[camera_id.strip()] = int(source) if source.isdigit() else source
+    return sources
+
+
+cameras: Dict[str, Camera] = {
+    camera_id: Camera(camera_id, source) for camera_id, source in parse_sources(CAMERA_SOURCES).items()
+}
+default_camera = next(iter(cameras.values()))
+
+def start_cameras():
+    for camera in cameras.values():
+        camera.start()
@@ -0,0 +1,34 @@
+# detection.py
+import cv2
+import easyocr
+from ocr_batcher import OcrBatcher
+
+# Load the license plate cascade classifier
+plate_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_russian_plate_number.xml')
+reader = easyocr.Reader(['en'])
+ocr_batcher = OcrBatcher(reader)
+
+def preprocess_image(image):
+    # Convert to grayscale
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    # Apply bilateral filter to remove noise while keeping edges sharp
+    gray = cv2.bilateralFilter(gray, 11, 17, 17)
+    # Apply adaptive thresholding
+    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    return thresh
+
+def locate_plates(frame):
+    """Haar cascade pass; returns [(x, y, w, h)] plate boxes."""
+    processed = preprocess_image(frame)
+    plates = plate_cascade.detectMultiScale(processed, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    return [tuple(int(v) for v in plate) for plate in plates]
+
+def read_plates(frame, boxes):
+    """OCR the given boxes through the shared batcher; returns [(text, confidence)] per box."""
+    pending = []
+    for (x, y, w, h) in boxes:
+        plate_roi = frame[y:y+h, x:x+w]
+        plate_gray = cv2.cvtColor(plate_roi, cv2.COLOR_BGR2GRAY)
+        plate_gray = cv2.bilateralFilter(plate_gray, 11, 17, 17)
+        pending.append(ocr_batcher.submit(plate_gray))
+    return [future.result() for future in pending]
@@ -0,0 +1,152 @@
+# dispatcher.py
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+BACKEND_URL = os.getenv("PLATE_BACKEND_URL", "http://localhost:8001/detect")
+SPOOL_DIR = os.getenv("PLATE_SPOOL_DIR", "spool")
+DISPATCH_QUEUE_SIZE = 1000
+DISPATCH_RETRIES = 3
+DISPATCH_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+DISPATCH_TIMEOUT = 5  # seconds per HTTP request
+BACKEND_DOWN_PAUSE = 30  # seconds to spool straight to disk after the backend failed
+SPOOL_REPLAY_INTERVAL = 5  # seconds of idle queue between spool replay attempts
+
+
+class PlateDispatcher:
+    """Delivers detected plates to the vehicle-detector from a background thread.
+
+    The frame loop only enqueues. Delivery uses a pooled keep-alive session
+    and retries with exponential backoff. Plates that still cannot be
+    delivered are spooled to disk as JSON and replayed in order once the
+    backend answers again.
+    """
+
+    def __init__(self, url: str = BACKEND_URL, spool_dir: str = SPOOL_DIR):
+        self.url = url
+        self.spool_dir = spool_dir
+        os.makedirs(spool_dir, exist_ok=True)
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self._queue: "queue.Queue" = queue.Queue(maxsize=DISPATCH_QUEUE_SIZE)
+        self._backend_down_until = 0.0
+        self.sent = 0
+        self.spooled = 0
+        threading.Thread(target=self._run, name="plate-dispatcher", daemon=True).start()
+
+    def submit(self, payload: dict, wait_for: Optional[Future] = None):
+        """Queue a plate for delivery, optionally after `wait_for` (e.g. its snapshot write) completes."""
+        try:
+            self._queue.put_nowait((payload, wait_for))
+        except queue.Full:
+            self._spool(payload)
+
+    def _post(self, payload: dict) -> bool:
+        try:
+            response = self.session.post(self.url, json=payload, timeout=DISPATCH_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"Error sending plate number to backend: {str(e)}")
+            return False
+        if response.status_code == 200:
+            print(f"Successfully sent plate number {payload['plate_number']} to backend")
+            return True
+        print(f"Failed to send plate number to backend. Status code: {response.status_code}")
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            # The backend rejected the payload itself; retrying would never succeed
+            return True
+        return False
+
+    def _deliver(self, payload: dict) -> bool:
+        if time.monotonic() < self._backend_down_until:
+            return False
+        for attempt in range(DISPATCH_RETRIES):
+            if self._post(payload):
+                return True
+            if attempt < DISPATCH_RETRIES - 1:
+                time.sleep(DISPATCH_BACKOFF * 2 ** attempt)
+        self._backend_down_until = time.monotonic() + BACKEND_DOWN_PAUSE
+        return False
+
+    def _spool(self, payload: dict):
+        name = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.json"
+        path = os.path.join(self.spool_dir, name)
+        # Write under a temporary name and rename, so a crash never leaves half a spool file
+        with open(path + ".part", "w") as spool_file:
+            json.dump(payload, spool_file)
+        os.replace(path + ".part", path)
+        self.spooled += 1
+        print(f"Backend unavailable, spooled plate {payload['plate_number']} to {name}")
+
+    def _spooled_files(self):
+        return sorted(name for name in os.listdir(self.spool_dir) if name.endswith(".json"))
+
+    def _replay_spool(self):
+        if time.monotonic() < self._backend_down_until:
+            return
+        for name in self._spooled_files():
+            path = os.path.join(self.spool_dir, name)
+            try:
+                with open(path) as spool_file:
+                    payload = json.load(spool_file)
+            except ValueError as e:
+                # Set aside rather than retried forever, so one bad file cannot stall the spool
+                print(f"Unreadable spool file {name}, moving it to {name}.bad: {e}")
+                os.replace(path, path + ".bad")
+                continue
+            if not self._post(payload):
+                self._backend_down_until = time.monotonic() + BACKEND_DOWN_PAUSE
+                return
+            os.remove(path)
+            self.sent += 1
+
+    def _run(self):
+        while True:
+            try:
+                self._dispatch_next()
+            except Exception as e:
+                # Keep the thread alive; undelivered plates are still on the queue or in the spool
+                print(f"Error in plate dispatcher: {e}")
+                time.sleep(DISPATCH_BACKOFF)
+
+    def _dispatch_next(self):
+        try:
+            payload, wait_for = self._queue.get(timeout=SPOOL_REPLAY_INTERVAL)
+        except queue.Empty:
+            self._replay_spool()
+            return
+        try:
+            if wait_for is not None:
+                try:
+                    wait_for.result(timeout=DISPATCH_TIMEOUT)
+                except Exception as e:
+                    print(f"Snapshot for plate {payload['plate_number']} was not written: {e}")
+            # Older spooled plates go first so the backend sees detections in order
+            self._replay_spool()
+            delivered = self._deliver(payload)
+        except Exception:
+            self._spool(payload)
+            raise
+        if delivered:
+            self.sent += 1
+        else:
+            self._spool(payload)
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "spooled": self.spooled,
+            "queued": self._queue.qsize(),
+            "spool_backlog": len(self._spooled_files()),
+            "backend_down": time.monotonic() < self._backend_down_until,
+        }
+
+
+dispatcher = PlateDispatcher()
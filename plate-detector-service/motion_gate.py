@@ -0,0 +1,64 @@
+# motion_gate.py
+import os
+import cv2
+import numpy as np
+
+MOTION_WIDTH = int(os.getenv("MOTION_WIDTH", "160"))  # pixels; frames are diffed at this width
+MOTION_PIXEL_DELTA = int(os.getenv("MOTION_PIXEL_DELTA", "25"))
+MOTION_MIN_CHANGED = float(os.getenv("MOTION_MIN_CHANGED", "0.01"))  # fraction of pixels
+MOTION_HOLD_FRAMES = int(os.getenv("MOTION_HOLD_FRAMES", "15"))
+DETECTION_STRIDE = int(os.getenv("DETECTION_STRIDE", "15"))
+
+
+class MotionGate:
+    """Cheap check in front of the cascade: is anything happening in this frame?
+
+    Frames are shrunk to a thumbnail and diffed against the previous one.
+    Motion opens the gate for `hold_frames` frames, so a vehicle that pulls
+    up and stops is still read. While the scene is static, only every
+    `stride`-th frame reaches the cascade and OCR.
+    """
+
+    def __init__(self, width: int = MOTION_WIDTH, pixel_delta: int = MOTION_PIXEL_DELTA,
+                 min_changed: float = MOTION_MIN_CHANGED, hold_frames: int = MOTION_HOLD_FRAMES,
+                 stride: int = DETECTION_STRIDE):
+        self.width = width
+        self.pixel_delta = pixel_delta
+        self.min_changed = min_changed
+        self.hold_frames = hold_frames
+        self.stride = stride
+        self._previous = None
+        self._hold = 0
+        self.frames = 0
+        self.skipped = 0
+
+    def _thumbnail(self, frame):
+        height = max(1, frame.shape[0] * self.width // frame.shape[1])
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+    def should_detect(self, frame) -> bool:
+        """Feed every frame through here; returns whether to run detection on it."""
+        small = self._thumbnail(frame)
+        previous, self._previous = self._previous, small
+        self.frames += 1
+        if previous is None:
+            return True
+
+        changed = np.count_nonzero(cv2.absdiff(small, previous) > self.pixel_delta) / small.size
+        if changed >= self.min_changed:
+            self._hold = self.hold_frames
+        if self._hold > 0:
+            self._hold -= 1
+            return True
+        if self.stride and self.frames % self.stride == 0:
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "active": self._hold > 0,
+        }
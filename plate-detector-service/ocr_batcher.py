@@ -0,0 +1,91 @@
+# ocr_batcher.py
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+import numpy as np
+
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "16"))
+OCR_BATCH_WAIT = float(os.getenv("OCR_BATCH_WAIT_SECONDS", "0.02"))
+CROP_GAP = 8  # blank rows between stacked crops so boxes never touch
+
+
+class OcrBatcher:
+    """Recognition-only OCR for plate crops, batched across frames and cameras.
+
+    The Haar cascade has already localized each plate, so EasyOCR's text
+    detector is skipped entirely: crops are stacked onto one canvas and
+    passed to reader.recognize() with one box per crop. Callers get a
+    Future resolving to (text, confidence) for their crop.
+    """
+
+    def __init__(self, reader, batch_size: int = OCR_BATCH_SIZE, batch_wait: float = OCR_BATCH_WAIT):
+        self.reader = reader
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._pending: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self.batches = 0
+        self.crops = 0
+        threading.Thread(target=self._run, name="ocr-batcher", daemon=True).start()
+
+    def submit(self, crop_gray: np.ndarray) -> Future:
+        future = Future()
+        self._pending.put((crop_gray, future))
+        return future
+
+    def _collect(self) -> List[Tuple[np.ndarray, Future]]:
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.recognize([crop for crop, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self.batches += 1
+            self.crops += len(batch)
+
+    def recognize(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        width = max(crop.shape[1] for crop in crops)
+        height = sum(crop.shape[0] for crop in crops) + CROP_GAP * (len(crops) - 1)
+        canvas = np.zeros((height, width), dtype=np.uint8)
+
+        boxes = []
+        top = 0
+        for crop in crops:
+            h, w = crop.shape[:2]
+            canvas[top:top + h, :w] = crop
+            boxes.append([0, w, top, top + h])  # easyocr order: x_min, x_max, y_min, y_max
+            top += h + CROP_GAP
+
+        raw = self.reader.recognize(
+            canvas, horizontal_list=boxes, free_list=[], batch_size=len(crops), detail=1
+        )
+        # Results come back per box; match them to crops by their top edge
+        by_top = {int(points[0][1]): (text, float(confidence)) for points, text, confidence in raw}
+        return [by_top.get(box[2], ("", 0.0)) for box in boxes]
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "crops": self.crops,
+            "avg_batch_size": round(self.crops / self.batches, 2) if self.batches else 0.0,
+            "queued": self._pending.qsize(),
+        }
@@ -0,0 +1,132 @@
+# pipeline.py
+import threading
+import time
+from typing import Any, NamedTuple, Optional, Tuple
+
+
+class CapturedFrame(NamedTuple):
+    image: Any
+    timestamp: float  # time.time(), drives the reading-window logic
+    perf: float  # time.perf_counter(), used for stage latency
+
+
+class FrameSlot:
+    """Single-slot buffer that always holds the newest item.
+
+    Writers never block: a put() over an item nobody took replaces it and
+    counts as a dropped frame. take() consumes the item (one worker per
+    frame); wait_newer() peeks, so any number of readers see the latest item.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item: Any = None
+        self._seq = 0
+        self._taken = True
+        self.dropped = 0
+
+    def put(self, item: Any):
+        with self._cond:
+            if not self._taken:
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._taken = False
+            self._cond.notify_all()
+
+    def take(self, timeout: Optional[float] = None) -> Tuple[int, Any]:
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self._taken, timeout):
+                return self._seq, None
+            self._taken = True
+            return self._seq, self._item
+
+    def wait_newer(self, seq: int, timeout: Optional[float] = None) -> Tuple[int, Any]:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > seq, timeout):
+                return seq, None
+            return self._seq, self._item
+
+    @property
+    def depth(self) -> int:
+        return 0 if self._taken else 1
+
+
+class StageStats:
+    """Per-stage counters: processing latency and how old frames are when the stage gets them."""
+
+    def __init__(self, name: str, smoothing: float = 0.1):
+        self.name = name
+        self.smoothing = smoothing
+        self.count = 0
+        self.latency_ms = 0.0
+        self.wait_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, started: float, captured_at: Optional[float] = None):
+        """Record a stage run that began at time.perf_counter() value `started`."""
+        now = time.perf_counter()
+        latency = (now - started) * 1000
+        with self._lock:
+            self.count += 1
+            weight = 1.0 if self.count == 1 else self.smoothing
+            self.latency_ms += weight * (latency - self.latency_ms)
+            self.max_latency_ms = max(self.max_latency_ms, latency)
+            if captured_at is not None:
+                wait = (started - captured_at) * 1000
+                self.wait_ms += weight * (wait - self.wait_ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "frames": self.count,
+            "avg_latency_ms": round(self.latency_ms, 2),
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "avg_queue_wait_ms": round(self.wait_ms, 2),
+        }
+
+
+class FrameBroadcast:
+    """Encoded MJPEG parts produced once and shared by every /video_feed viewer.
+
+    Viewers only ever read the latest part, so a slow client skips frames
+    instead of back-pressuring the encoder. The encoder can idle while
+    nobody is watching.
+    """
+
+    def __init__(self):
+        self._slot = FrameSlot()
+        self._lock = threading.Lock()
+        self._viewers = 0
+        self._watched = threading.Event()
+
+    def publish(self, jpeg_bytes: bytes):
+        # Build the multipart chunk here once rather than once per viewer
+        self._slot.put(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n')
+
+    def wait_for_viewers(self, timeout: Optional[float] = None) -> bool:
+        return self._watched.wait(timeout)
+
+    def _subscribe(self, delta: int):
+        with self._lock:
+            self._viewers += delta
+            if self._viewers:
+                self._watched.set()
+            else:
+                self._watched.clear()
+
+    def stream(self, stopped: threading.Event):
+        """Generator of multipart chunks for one viewer."""
+        self._subscribe(1)
+        try:
+            seq = 0
+            while not stopped.is_set():
+                seq, chunk = self._slot.wait_newer(seq, timeout=1.0)
+                if chunk is not None:
+                    yield chunk
+        finally:
+            self._subscribe(-1)
+
+    @property
+    def viewers(self) -> int:
+        return self._viewers
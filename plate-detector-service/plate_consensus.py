@@ -0,0 +1,98 @@
+# plate_consensus.py
+import os
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+CONSENSUS_CERTAINTY = float(os.getenv("CONSENSUS_CERTAINTY", "0.9"))
+# Pseudo-weight of "some other character" at every position; keeps one clean
+# read from looking certain and makes certainty grow with agreeing evidence
+CONSENSUS_PRIOR = float(os.getenv("CONSENSUS_PRIOR", "0.05"))
+
+_SEPARATORS = re.compile(r"[\s\-_.·]+")
+_INVALID = re.compile(r"[^A-Z0-9 ]")
+
+
+def normalize_plate(text: str) -> str:
+    """Uppercase, map separators to single spaces and drop anything that is not a plate character."""
+    text = _SEPARATORS.sub(" ", text.upper())
+    return " ".join(_INVALID.sub("", text).split())
+
+
+class PlateConsensus:
+    """Character-level, confidence-weighted consensus over OCR reads of one plate.
+
+    Reads are aligned to a reference read: the heaviest read of the most
+    common length. Same-length reads map position by position; others are
+    aligned with difflib. Each position then votes on its character. The
+    certainty is the product of per-position posteriors, so a plate is
+    only certain when every character is.
+    """
+
+    def __init__(self):
+        self.readings: List[Tuple[str, float]] = []
+        self._result: Optional[Tuple[Optional[str], float]] = None
+
+    def add(self, text: str, confidence: float):
+        plate = normalize_plate(text)
+        if plate:
+            self.readings.append((plate, confidence))
+            self._result = None
+
+    @property
+    def reads(self) -> int:
+        return len(self.readings)
+
+    @property
+    def weight(self) -> float:
+        return sum(confidence for _, confidence in self.readings)
+
+    def result(self) -> Tuple[Optional[str], float]:
+        """(plate, certainty in [0, 1]); plate is None before any usable read."""
+        if self._result is None:
+            self._result = self._compute()
+        return self._result
+
+    def _reference(self) -> str:
+        weight_by_length: Dict[int, float] = defaultdict(float)
+        for plate, confidence in self.readings:
+            weight_by_length[len(plate.replace(" ", ""))] += confidence
+        length = max(weight_by_length.items(), key=lambda item: item[1])[0]
+        candidates = [(plate, c) for plate, c in self.readings if len(plate.replace(" ", "")) == length]
+        return max(candidates, key=lambda item: item[1])[0]
+
+    def _compute(self) -> Tuple[Optional[str], float]:
+        if not self.readings:
+            return None, 0.0
+        reference = self._reference()
+        ref_chars = reference.replace(" ", "")
+        votes: List[Dict[str, float]] = [defaultdict(float) for _ in ref_chars]
+
+        for plate, confidence in self.readings:
+            chars = plate.replace(" ", "")
+            if len(chars) == len(ref_chars):
+                for i, char in enumerate(chars):
+                    votes[i][char] += confidence
+                continue
+            for op, i1, i2, j1, j2 in SequenceMatcher(None, ref_chars, chars, autojunk=False).get_opcodes():
+                # Only spans that line up one-to-one carry positional evidence
+                if op in ("equal", "replace") and (i2 - i1) == (j2 - j1):
+                    for offset in range(i2 - i1):
+                        votes[i1 + offset][chars[j1 + offset]] += confidence
+
+        consensus = []
+        certainty = 1.0
+        for position in votes:
+            if not position:
+                return None, 0.0
+            char, weight = max(position.items(), key=lambda item: item[1])
+            consensus.append(char)
+            certainty *= weight / (sum(position.values()) + CONSENSUS_PRIOR)
+
+        # Put the reference read's separators back around the consensus characters
+        plate = []
+        chars = iter(consensus)
+        for ref_char in reference:
+            plate.append(" " if ref_char == " " else next(chars))
+        return "".join(plate), certainty
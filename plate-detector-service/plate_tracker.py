@@ -0,0 +1,119 @@
+# plate_tracker.py
+import os
+from typing import List, Optional, Sequence, Tuple
+from plate_consensus import CONSENSUS_CERTAINTY, PlateConsensus
+
+TRACK_IOU_THRESHOLD = float(os.getenv("TRACK_IOU_THRESHOLD", "0.3"))
+TRACK_MAX_MISSED = int(os.getenv("TRACK_MAX_MISSED", "10"))  # detection passes before a track is dropped
+VOTE_MIN_READS = int(os.getenv("VOTE_MIN_READS", "2"))
+
+Box = Tuple[int, int, int, int]  # x, y, w, h
+
+
+def iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    overlap_w = min(ax + aw, bx + bw) - max(ax, bx)
+    overlap_h = min(ay + ah, by + bh) - max(ay, by)
+    if overlap_w <= 0 or overlap_h <= 0:
+        return 0.0
+    overlap = overlap_w * overlap_h
+    return overlap / float(aw * ah + bw * bh - overlap)
+
+
+def centroid_distance(a: Box, b: Box) -> float:
+    return (((a[0] + a[2] / 2) - (b[0] + b[2] / 2)) ** 2 + ((a[1] + a[3] / 2) - (b[1] + b[3] / 2)) ** 2) ** 0.5
+
+
+class Track:
+    """One physical plate followed across frames, with a character-level consensus on its text."""
+
+    __slots__ = ("track_id", "box", "missed", "consensus")
+
+    def __init__(self, track_id: int, box: Box):
+        self.track_id = track_id
+        self.box = box
+        self.missed = 0
+        self.consensus = PlateConsensus()
+
+    def add_reading(self, text: str, confidence: float):
+        self.consensus.add(text, confidence)
+
+    @property
+    def reads(self) -> int:
+        return self.consensus.reads
+
+    @property
+    def leader(self) -> Tuple[Optional[str], float]:
+        """Consensus plate and its posterior certainty."""
+        return self.consensus.result()
+
+    @property
+    def converged(self) -> bool:
+        """Certain enough to emit; further OCR on this track is wasted."""
+        return self.reads >= VOTE_MIN_READS and self.leader[1] >= CONSENSUS_CERTAINTY
+
+
+class PlateTracker:
+    """Associates cascade boxes across frames so each plate is OCR'd only until its vote settles."""
+
+    def __init__(self):
+        self.tracks: List[Track] = []
+        self._next_id = 1
+
+    def update(self, boxes: Sequence[Box]) -> List[Track]:
+        """Match this frame's boxes to tracks; returns the track for each box, in order."""
+        active = [track for track in self.tracks if track.missed <= TRACK_MAX_MISSED]
+        assigned: List[Optional[Track]] = [None] * len(boxes)
+        used = set()
+
+        # Greedy IoU matching, best overlaps first
+        pairs = sorted(
+            ((iou(box, track.box), i, track) for i, box in enumerate(boxes) for track in active),
+            key=lambda pair: pair[0], reverse=True,
+        )
+        for score, i, track in pairs:
+            if score < TRACK_IOU_THRESHOLD:
+                break
+            if assigned[i] is None and track.track_id not in used:
+                assigned[i] = track
+                used.add(track.track_id)
+
+        # Fast-moving plates may not overlap between processed frames; fall back to centroids
+        for i, box in enumerate(boxes):
+            if assigned[i] is not None:
+                continue
+            candidates = [t for t in active if t.track_id not in used
+                          and centroid_distance(box, t.box) < max(box[2], box[3])]
+            if candidates:
+                track = min(candidates, key=lambda t: centroid_distance(box, t.box))
+            else:
+                track = Track(self._next_id, box)
+                self._next_id += 1
+                self.tracks.append(track)
+            assigned[i] = track
+            used.add(track.track_id)
+
+        for track in active:
+            if track.track_id not in used:
+                track.missed += 1
+        for track, box in zip(assigned, boxes):
+            track.box = box
+            track.missed = 0
+        return assigned
+
+    def decisive(self) -> Optional[Track]:
+        """The most certain converged track, if any; the reading window can close on it."""
+        converged = [track for track in self.tracks if track.converged]
+        return max(converged, key=lambda track: track.leader[1]) if converged else None
+
+    def best_plate(self) -> Optional[str]:
+        """Consensus plate of the track with the most read evidence in the window."""
+        read = [track for track in self.tracks if track.reads]
+        if not read:
+            return None
+        return max(read, key=lambda track: track.consensus.weight).leader[0]
+
+    @property
+    def reads(self) -> int:
+        return sum(track.reads for track in self.tracks)
@@ -0,0 +1,139 @@
+# snapshot_store.py
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Tuple
+import cv2
+
+SNAPSHOT_ROOT = os.getenv("SNAPSHOT_ROOT", "snapshots")
+THUMBNAIL_WIDTH = int(os.getenv("SNAPSHOT_THUMBNAIL_WIDTH", "320"))
+RETENTION_DAYS = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "30"))
+RETENTION_MAX_BYTES = int(os.getenv("SNAPSHOT_MAX_BYTES", str(10 * 1024 ** 3)))
+SWEEP_INTERVAL = 3600  # seconds
+
+# vehicle_<YYYYMMDD>_<HHMMSS>_<plate>.jpg; the date in the name locates the shard
+_NAME = re.compile(r"^vehicle_(\d{4})(\d{2})(\d{2})_\d{6}_[A-Za-z0-9\-]+\.jpg$")
+
+
+class SnapshotStore:
+    """Date-sharded snapshot storage with thumbnails and a retention sweeper.
+
+    Snapshots live in <root>/YYYY/MM/DD/, and each one has a downscaled
+    <name>.thumb.jpg beside it. The shard is derived from the timestamp in
+    the filename, so lookups never scan a directory. Files are immutable
+    once written.
+    """
+
+    def __init__(self, root: str = SNAPSHOT_ROOT):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # Encoding and disk writes never run on a frame-processing thread
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-io")
+        self._sweeper: Optional[threading.Thread] = None
+
+    def _shard(self, name: str) -> Optional[str]:
+        match = _NAME.match(name)
+        if not match:
+            return None
+        return os.path.join(self.root, *match.groups())
+
+    def save(self, frame, plate_text: str) -> Tuple[str, Future]:
+        """Name the snapshot now and write it on the I/O thread; returns (path, write future)."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Format plate number by replacing spaces with hyphens
+        formatted_plate = plate_text.replace(" ", "-")
+        name = f"vehicle_{timestamp}_{formatted_plate}.jpg"
+        path = os.path.join(self._shard(name), name)
+        return path, self._io.submit(self._write, path, frame)
+
+    def _write(self, path: str, frame):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        height, width = frame.shape[:2]
+        thumbnail = cv2.resize(
+            frame, (THUMBNAIL_WIDTH, max(1, height * THUMBNAIL_WIDTH // width)), interpolation=cv2.INTER_AREA
+        ) if width > THUMBNAIL_WIDTH else frame
+        # Write under a temporary name and rename, so readers never see half a file
+        for target, image in ((self.thumbnail_path(path), thumbnail), (path, frame)):
+            ok, buffer = cv2.imencode(".jpg", image)
+            if not ok:
+                raise IOError(f"Could not encode snapshot {target}")
+            partial = target + ".part"
+            with open(partial, "wb") as snapshot_file:
+                snapshot_file.write(buffer.tobytes())
+            os.replace(partial, target)
+
+    @staticmethod
+    def thumbnail_path(path: str) -> str:
+        return path[:-len(".jpg")] + ".thumb.jpg"
+
+    def find(self, name: str, thumbnail: bool = False) -> Optional[str]:
+        """Path of an existing snapshot (or its thumbnail) by bare filename."""
+        if os.path.basename(name) != name or name.startswith("."):
+            return None
+        shard = self._shard(name)
+        # The flat layout predates sharding and may still hold older snapshots
+        candidates = ([os.path.join(shard, name)] if shard else []) + [os.path.join(self.root, name)]
+        for path in candidates:
+            if thumbnail:
+                path = self.thumbnail_path(path)
+            if os.path.isfile(path):
+                return path
+        if thumbnail:
+            # Snapshots from before thumbnails existed fall back to the original
+            return self.find(name)
+        return None
+
+    def sweep(self):
+        """Delete day shards older than the retention period, then the oldest files while over budget."""
+        cutoff = time.time() - RETENTION_DAYS * 86400
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= RETENTION_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        # Drop day directories the sweep emptied
+        for directory, subdirs, names in os.walk(self.root, topdown=False):
+            if directory != self.root and not subdirs and not names:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+        if removed:
+            print(f"Snapshot retention removed {removed} files")
+
+    def _sweep_loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping snapshots: {e}")
+            time.sleep(SWEEP_INTERVAL)
+
+    def start_sweeper(self):
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="snapshot-sweeper", daemon=True)
+            self._sweeper.start()
+
+
+snapshot_store = SnapshotStore()
@@ -1,5 +1,8 @@
 from supabase import create_client
+import csv
+import io
 import os
+import re
 from dotenv import load_dotenv
 from datetime import datetime, date, time
 from typing import List, Dict, Optional
@@ -11,6 +14,12 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+IMPORT_CHUNK_SIZE = 200  # rows per multi-row insert
+PAGE_SIZE = 1000  # PostgREST's default row cap
+
+_PLATE_SEPARATORS = re.compile(r"[\s\-_.]+")
+_PLATE = re.compile(r"^[A-Z0-9]+(-[A-Z0-9]+)*$")
+
 def create_event(
     event_name: str,
     event_date: date,
@@ -132,6 +141,12 @@ def remove_event_guest_vehicle(event_id: str, plate_number: str) -> None:
 
 def check_vehicle_event_authorization(plate_number: str) -> Optional[Dict]:
     """Check if a vehicle is authorized for any active event."""
+    # The scheduler's snapshot of active events answers without any queries
+    from event_scheduler import event_scheduler
+    if event_scheduler.ready:
+        match = event_scheduler.lookup(plate_number)
+        return match and {**match, "vehicle": {"event_id": match["event_id"], "plate_number": plate_number}}
+
     try:
         # Get current date and time
         now = datetime.now()
@@ -165,4 +180,83 @@ def check_vehicle_event_authorization(plate_number: str) -> Optional[Dict]:
 
     except Exception as e:
         print("Error checking vehicle authorization:", e)
-        raise 
\ No newline at end of file
+        raise
+
+def normalize_plate(plate_number: str) -> str:
+    """Uppercase and join plate groups with hyphens, the format the plate detector sends."""
+    return _PLATE_SEPARATORS.sub("-", plate_number.strip().upper()).strip("-")
+
+def parse_roster_csv(text: str) -> List[Dict]:
+    """Rows of a CSV roster with a header line (plate_number, name, reason, added_by)."""
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    return [{(key or "").strip().lower(): (value or "").strip() for key, value in row.items()} for row in reader]
+
+def _roster_plates(event_id: str) -> set:
+    plates = set()
+    start = 0
+    while True:
+        rows = supabase.table("event_guest_vehicles").select("plate_number").eq(
+            "event_id", event_id
+        ).range(start, start + PAGE_SIZE - 1).execute().data
+        plates.update(normalize_plate(row["plate_number"]) for row in rows)
+        if len(rows) < PAGE_SIZE:
+            return plates
+        start += PAGE_SIZE
+
+def import_event_guest_vehicles(event_id: str, rows: List[Dict], added_by: Optional[str] = None) -> Dict:
+    """Validate, deduplicate and insert a roster; returns a result for every input row."""
+    report = []
+    accepted = []
+    seen = set()
+    for index, row in enumerate(rows, start=1):
+        raw_plate = str(row.get("plate_number") or "")
+        plate_number = normalize_plate(raw_plate)
+        name = str(row.get("name") or "").strip()
+        result = {"row": index, "plate_number": plate_number or raw_plate}
+        report.append(result)
+        if not _PLATE.match(plate_number) or not 2 <= len(plate_number.replace("-", "")) <= 12:
+            result.update(status="invalid", error="Invalid plate number")
+        elif not name:
+            result.update(status="invalid", error="Name is required")
+        elif not (row.get("added_by") or added_by):
+            result.update(status="invalid", error="added_by is required")
+        elif plate_number in seen:
+            result.update(status="duplicate", error="Plate appears earlier in the import")
+        else:
+            seen.add(plate_number)
+            accepted.append((result, {
+                "event_id": event_id,
+                "plate_number": plate_number,
+                "name": name,
+                "reason": row.get("reason") or None,
+                "added_by": row.get("added_by") or added_by
+            }))
+
+    # One roster read instead of a lookup per plate
+    existing = _roster_plates(event_id) if accepted else set()
+    pending = []
+    for result, vehicle in accepted:
+        if vehicle["plate_number"] in existing:
+            result.update(status="duplicate", error="Plate is already registered for this event")
+        else:
+            pending.append((result, vehicle))
+
+    for start in range(0, len(pending), IMPORT_CHUNK_SIZE):
+        chunk = pending[start:start + IMPORT_CHUNK_SIZE]
+        try:
+            response = supabase.table("event_guest_vehicles").insert([vehicle for _, vehicle in chunk]).execute()
+            inserted = {row["plate_number"]: row for row in response.data or []}
+            for result, vehicle in chunk:
+                if vehicle["plate_number"] in inserted:
+                    result.update(status="inserted", id=inserted[vehicle["plate_number"]].get("id"))
+                else:
+                    result.update(status="error", error="Row was not returned by the insert")
+        except Exception as e:
+            print("Error importing guest vehicles:", e)
+            for result, _ in chunk:
+                result.update(status="error", error=str(e))
+
+    counts = {}
+    for result in report:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"event_id": event_id, "total": len(report), "counts": counts, "rows": report}
@@ -0,0 +1,161 @@
+# event_scheduler.py
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, date, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from event_management import supabase, normalize_plate, PAGE_SIZE
+from rabbitmq_publisher import broadcast
+
+# Fanout exchange: every authorization consumer gets its own copy of each snapshot
+SNAPSHOT_EXCHANGE = "event.authorization.snapshot"
+RESCAN_INTERVAL = int(os.getenv("EVENT_SCHEDULER_RESCAN_SECONDS", "60"))
+# Re-send an unchanged snapshot this often so a restarted consumer catches up
+REPUBLISH_INTERVAL = int(os.getenv("EVENT_SNAPSHOT_REPUBLISH_SECONDS", "300"))
+
+
+def _window(event: Dict) -> Tuple[datetime, datetime]:
+    event_date = date.fromisoformat(event["event_date"])
+    start = datetime.combine(event_date, time.fromisoformat(event["start_time"]))
+    end = datetime.combine(event_date, time.fromisoformat(event["end_time"]))
+    # An end time before the start time means the event runs past midnight
+    return start, end if end > start else end + timedelta(days=1)
+
+
+class EventScheduler:
+    """Moves events between scheduled, active and expired at their start and end times.
+
+    Events up to today that have not expired are loaded in one query. The
+    thread sleeps until the next start or end time, capped at the rescan
+    interval, which also picks up new events and the next day's events.
+    After each pass it publishes a snapshot of the active events' windows
+    and plates, so authorization consumers decide event access from memory.
+    Endpoints that change events or rosters call `invalidate()` to trigger
+    a pass straight away.
+    """
+
+    def __init__(self, rescan_interval: int = RESCAN_INTERVAL):
+        self.rescan_interval = rescan_interval
+        self.snapshot: Optional[Dict] = None
+        self._plates: Dict[str, List[str]] = {}  # plate -> active event ids
+        self._digest: Optional[str] = None
+        self._published_at: Optional[datetime] = None
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.transitions = 0
+
+    def _set_status(self, event_ids: List[str], status: str, now: datetime):
+        if event_ids:
+            supabase.table("events").update({
+                "status": status,
+                "updated_at": now.isoformat()
+            }).in_("id", event_ids).execute()
+            self.transitions += len(event_ids)
+            print(f"[*] Events {status}: {', '.join(map(str, event_ids))}")
+
+    def _roster(self, event_ids: List[str]) -> List[Dict]:
+        rows = []
+        start = 0
+        while True:
+            page = supabase.table("event_guest_vehicles").select("event_id, plate_number").in_(
+                "event_id", event_ids
+            ).range(start, start + PAGE_SIZE - 1).execute().data
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            start += PAGE_SIZE
+
+    def run_once(self) -> datetime:
+        """Apply due transitions and publish the snapshot; returns when the next one is due."""
+        now = datetime.now()
+        events = supabase.table("events").select(
+            "id, event_name, event_date, start_time, end_time, status"
+        ).neq("status", "expired").lte("event_date", now.date().isoformat()).execute().data
+
+        to_activate, to_expire, active = [], [], []
+        next_transition = now + timedelta(seconds=self.rescan_interval)
+        for event in events:
+            start, end = _window(event)
+            if now >= end:
+                to_expire.append(event["id"])
+                continue
+            if now >= start:
+                active.append((event, start, end))
+                if event["status"] != "active":
+                    to_activate.append(event["id"])
+            next_transition = min(next_transition, start if now < start else end)
+
+        self._set_status(to_activate, "active", now)
+        self._set_status(to_expire, "expired", now)
+        self._publish_snapshot(active, now)
+        return next_transition
+
+    def _publish_snapshot(self, active: List[Tuple[Dict, datetime, datetime]], now: datetime):
+        events = {
+            str(event["id"]): {"name": event["event_name"], "start": start.isoformat(), "end": end.isoformat(),
+                               "plates": []}
+            for event, start, end in active
+        }
+        plates: Dict[str, List[str]] = {}
+        if events:
+            for row in self._roster([event["id"] for event, _, _ in active]):
+                plate_number = normalize_plate(row["plate_number"])
+                events[str(row["event_id"])]["plates"].append(plate_number)
+                plates.setdefault(plate_number, []).append(str(row["event_id"]))
+        for event in events.values():
+            event["plates"].sort()
+
+        digest = hashlib.sha1(json.dumps(events, sort_keys=True).encode()).hexdigest()
+        self._plates = plates
+        if digest == self._digest and self._published_at and now - self._published_at < timedelta(seconds=REPUBLISH_INTERVAL):
+            return
+        self.snapshot = {"version": digest, "generated_at": now.isoformat(), "events": events}
+        broadcast(SNAPSHOT_EXCHANGE, self.snapshot)
+        self._digest = digest
+        self._published_at = now
+        print(f"[*] Published event snapshot: {len(events)} active events, {len(plates)} plates")
+
+    def lookup(self, plate_number: str) -> Optional[Dict]:
+        """The active event a plate is registered for, from the last snapshot."""
+        event_ids = self._plates.get(normalize_plate(plate_number))
+        if not event_ids or self.snapshot is None:
+            return None
+        return {"event_id": event_ids[0], "event_name": self.snapshot["events"][event_ids[0]]["name"]}
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot is not None
+
+    def invalidate(self):
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            next_transition = datetime.now() + timedelta(seconds=self.rescan_interval)
+            try:
+                next_transition = self.run_once()
+            except Exception as e:
+                print(f"Error running event scheduler: {e}")
+            # Wake a moment after the transition so the comparison lands on the right side
+            delay = (next_transition - datetime.now()).total_seconds() + 0.5
+            self._wake.wait(max(0.5, min(delay, self.rescan_interval)))
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="event-scheduler", daemon=True)
+            self._thread.start()
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "version": self._digest,
+            "published_at": self._published_at.isoformat() if self._published_at else None,
+            "active_events": len(self.snapshot["events"]) if self.snapshot else 0,
+            "plates": len(self._plates),
+            "transitions": self.transitions,
+        }
+
+
+event_scheduler = EventScheduler()
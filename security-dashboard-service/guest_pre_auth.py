@@ -1,6 +1,7 @@
 # guest_pre_auth.py
 from supabase import create_client
 import os
+import urllib.request
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +11,19 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# The authorization service caches guest windows; it is told to reload after every guest write
+AUTHORIZATION_INDEX_REFRESH_URL = os.getenv(
+    "AUTHORIZATION_INDEX_REFRESH_URL", "http://localhost:8002/api/authorization-index/refresh"
+)
+
+def refresh_authorization_index():
+    try:
+        request = urllib.request.Request(AUTHORIZATION_INDEX_REFRESH_URL, method="POST")
+        urllib.request.urlopen(request, timeout=2).close()
+    except Exception as e:
+        # The index still picks the guest up at its next periodic sync
+        print("Error refreshing authorization index:", e)
+
 def insert_guest_vehicle(
     plate_number: str, 
     owner_name: str, 
@@ -27,6 +41,7 @@ def insert_guest_vehicle(
             "valid_until": valid_until,
             "added_by": added_by
         }).execute()
+        refresh_authorization_index()
 
         if response.status_code == 201:
             print("Guest vehicle added successfully:", response)
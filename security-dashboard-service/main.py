@@ -1,9 +1,13 @@
 from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 import threading
-from manual_approvals import get_all_pending, remove_vehicle
-from rabbitmq import consume_manual_approvals, send_manual_approval
+from manual_approvals import get_all_pending, remove_vehicle, pending_approvals
+from rabbitmq import consume_manual_approvals, send_manual_approval, send_manual_approvals
+from rabbitmq_publisher import PublishError
+from event_stream import broadcaster
+from event_scheduler import event_scheduler
+from tracing import metrics
 from guest_pre_auth import insert_guest_vehicle
 from event_management import (
     create_event,
@@ -11,16 +15,23 @@ from event_management import (
     get_event,
     update_event_status,
     add_event_guest_vehicle,
+    import_event_guest_vehicles,
+    parse_roster_csv,
     get_event_guest_vehicles,
     remove_event_guest_vehicle
 )
 from datetime import datetime, date, time
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from typing import List, Literal, Optional
+from pydantic import BaseModel
 
 app = FastAPI()
 templates = Jinja2Templates(directory="templates")
 
+class BulkDecision(BaseModel):
+    request_ids: List[str]
+    action: Literal["approve", "decline"]
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +39,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 @app.on_event("startup")
@@ -35,37 +47,89 @@ def start_consumer():
     thread = threading.Thread(target=consume_manual_approvals)
     thread.daemon = True
     thread.start()
+    # Activates and expires events on time and publishes the active-event snapshot
+    event_scheduler.start()
 
 @app.get("/", response_class=HTMLResponse)
 def dashboard(request: Request):
     vehicles = get_all_pending()
     return templates.TemplateResponse("dashboard.html", {"request": request, "vehicles": vehicles})
 
+@app.get("/api/stream")
+async def stream_events(request: Request):
+    # Server-sent "pending_added" / "pending_removed" events for the approval queue
+    return broadcaster.response(request)
+
+@app.get("/metrics")
+def get_metrics(format: str = "prometheus"):
+    if format == "json":
+        return metrics.report()
+    return PlainTextResponse(metrics.prometheus("security-dashboard"))
+
 @app.get("/api/vehicles/pending")
-def get_pending_vehicles():
-    return JSONResponse(content=get_all_pending())
+def get_pending_vehicles(plate_number: Optional[str] = None, offset: int = 0, limit: Optional[int] = None):
+    if offset < 0 or (limit is not None and limit < 1):
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit >= 1")
+    vehicles, total = pending_approvals.list(plate_number, offset, limit)
+    return JSONResponse(content=vehicles, headers={"X-Total-Count": str(total)})
+
+def resolve_pending(plate_number: str, result) -> Optional[dict]:
+    """Take the oldest pending request for a plate and publish result(vehicle) for it."""
+    vehicle = remove_vehicle(plate_number)
+    if vehicle is None:
+        return None
+    try:
+        send_manual_approval(result(vehicle))
+    except Exception:
+        # Keep the request queued so the guard can retry
+        pending_approvals.add(vehicle)
+        raise
+    broadcaster.publish("pending_removed", {"plate_number": plate_number, "request_id": vehicle["request_id"]})
+    return vehicle
 
 @app.post("/approve/{plate_number}")
 def approve_vehicle(plate_number: str):
-    vehicles = get_all_pending()
-    for vehicle in vehicles:
-        if vehicle["plate_number"] == plate_number:
-            send_manual_approval(vehicle)
-            remove_vehicle(plate_number)
-            break
+    resolve_pending(plate_number, lambda vehicle: vehicle)
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/decline/{plate_number}")
 def decline_vehicle(plate_number: str):
-    vehicles = get_all_pending()
-    for vehicle in vehicles:
-        if vehicle["plate_number"] == plate_number:
-            # Send unauthorized_checked status to authorization result queue
-            send_manual_approval({**vehicle, "status": "unauthorized_checked", "security_clear": False})
-            remove_vehicle(plate_number)
-            break
+    # Send unauthorized_checked status to authorization result queue
+    resolve_pending(plate_number, lambda vehicle: {**vehicle, "status": "unauthorized_checked", "security_clear": False})
     return RedirectResponse(url="/", status_code=303)
 
+@app.post("/api/vehicles/pending/bulk")
+def decide_pending_vehicles(decision: BulkDecision):
+    # A stale id fails the whole batch; a failed publish returns only the unsent requests
+    vehicles, missing = pending_approvals.remove_many(decision.request_ids)
+    if missing:
+        raise HTTPException(status_code=409, detail={"message": "Requests are no longer pending", "missing": missing})
+
+    if decision.action == "decline":
+        results = [{**vehicle, "status": "unauthorized_checked", "security_clear": False} for vehicle in vehicles]
+    else:
+        results = vehicles
+    try:
+        send_manual_approvals(results)
+    except PublishError as e:
+        # Decisions already published stand; only the unsent requests go back to the queue
+        for vehicle in vehicles[e.sent:]:
+            pending_approvals.add(vehicle)
+        for vehicle in vehicles[:e.sent]:
+            broadcaster.publish("pending_removed", {"plate_number": vehicle["plate_number"], "request_id": vehicle["request_id"]})
+        raise HTTPException(status_code=503, detail={
+            "message": f"Could not publish decisions: {e}",
+            "processed": [vehicle["request_id"] for vehicle in vehicles[:e.sent]],
+        })
+    except Exception as e:
+        for vehicle in vehicles:
+            pending_approvals.add(vehicle)
+        raise HTTPException(status_code=503, detail=f"Could not publish decisions: {e}")
+
+    for vehicle in vehicles:
+        broadcaster.publish("pending_removed", {"plate_number": vehicle["plate_number"], "request_id": vehicle["request_id"]})
+    return {"action": decision.action, "processed": [vehicle["request_id"] for vehicle in vehicles]}
+
 @app.post("/add-guest-vehicle")
 def add_guest_vehicle(
     plate_number: str = Form(...),
@@ -96,6 +160,7 @@ async def create_new_event(
         end_time_obj = datetime.strptime(end_time, "%H:%M").time()
         
         event = create_event(event_name, event_date_obj, start_time_obj, end_time_obj)
+        event_scheduler.invalidate()
         return JSONResponse(content=event)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -108,6 +173,10 @@ async def list_events(status: Optional[str] = None):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/event-scheduler")
+def get_event_scheduler():
+    return event_scheduler.stats()
+
 @app.get("/api/events/{event_id}")
 async def get_event_details(event_id: str):
     try:
@@ -125,6 +194,7 @@ async def update_event_status_endpoint(event_id: str, status: str = Form(...)):
             raise HTTPException(status_code=400, detail="Invalid status")
         
         event = update_event_status(event_id, status)
+        event_scheduler.invalidate()
         return JSONResponse(content=event)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -139,10 +209,47 @@ async def add_vehicle_to_event(
 ):
     try:
         vehicle = add_event_guest_vehicle(event_id, plate_number, name, reason, added_by)
+        event_scheduler.invalidate()
         return JSONResponse(content=vehicle)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/events/{event_id}/vehicles/import")
+async def import_event_vehicles(event_id: str, request: Request, added_by: Optional[str] = None):
+    # Accepts a JSON list of rows, a text/csv body, or a CSV upload in the "file" form field
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("application/json"):
+            rows = await request.json()
+            if isinstance(rows, dict):
+                rows = rows.get("vehicles", [])
+        elif content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None:
+                raise HTTPException(status_code=400, detail="Missing CSV file in form field 'file'")
+            added_by = added_by or form.get("added_by")
+            rows = parse_roster_csv((await upload.read()).decode("utf-8"))
+        else:
+            rows = parse_roster_csv((await request.body()).decode("utf-8"))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse roster: {e}")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise HTTPException(status_code=400, detail="Roster must be a list of rows")
+
+    try:
+        if not get_event(event_id):
+            raise HTTPException(status_code=404, detail="Event not found")
+        report = import_event_guest_vehicles(event_id, rows, added_by)
+        event_scheduler.invalidate()
+        return JSONResponse(content=report)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/events/{event_id}/vehicles")
 async def list_event_vehicles(event_id: str):
     try:
@@ -155,23 +262,13 @@ async def list_event_vehicles(event_id: str):
 async def remove_vehicle_from_event(event_id: str, plate_number: str):
     try:
         remove_event_guest_vehicle(event_id, plate_number)
+        event_scheduler.invalidate()
         return JSONResponse(content={"message": "Vehicle removed successfully"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/update-plate/{old_plate}")
 def update_plate_number(old_plate: str, new_plate: str = Form(...)):
-    vehicles = get_all_pending()
-    for vehicle in vehicles:
-        if vehicle["plate_number"] == old_plate:
-            # Create a new vehicle object with updated plate number
-            updated_vehicle = vehicle.copy()
-            updated_vehicle["plate_number"] = new_plate
-            
-            # Remove the old vehicle entry
-            remove_vehicle(old_plate)
-            
-            # Send the updated vehicle data to the logger service
-            send_manual_approval(updated_vehicle)
-            break
+    # Send the vehicle data with the corrected plate number to the logger service
+    resolve_pending(old_plate, lambda vehicle: {**vehicle, "plate_number": new_plate})
     return RedirectResponse(url="/", status_code=303)
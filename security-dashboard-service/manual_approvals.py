@@ -1,12 +1,136 @@
 # manual_approvals.py
-pending_vehicles = []
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+PENDING_DB_PATH = os.getenv("PENDING_DB_PATH", "pending_approvals.db")
+
+
+class PendingApprovals:
+    """Vehicles waiting for a guard's decision, keyed by request id.
+
+    Pending requests are held in an insertion-ordered dict with a
+    plate -> request ids index, so insert, lookup and removal are O(1).
+    Every change is also written to an SQLite journal in WAL mode, so a
+    restart reloads the queue from disk instead of replaying RabbitMQ.
+    All methods are safe to call from the consumer thread and request
+    handlers at once.
+    """
+
+    def __init__(self, path: str = PENDING_DB_PATH):
+        self._lock = threading.Lock()
+        self._vehicles: Dict[str, dict] = {}
+        self._by_plate: Dict[str, Dict[str, None]] = {}  # dict as an ordered set
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending_approvals ("
+            " request_id TEXT PRIMARY KEY, plate_number TEXT NOT NULL,"
+            " received_at REAL NOT NULL, payload TEXT NOT NULL)"
+        )
+        for (payload,) in self._db.execute("SELECT payload FROM pending_approvals ORDER BY received_at, rowid"):
+            self._index(json.loads(payload))
+
+    def _index(self, vehicle: dict):
+        request_id = vehicle["request_id"]
+        self._vehicles[request_id] = vehicle
+        self._by_plate.setdefault(vehicle["plate_number"], {})[request_id] = None
+
+    def _unindex(self, request_id: str) -> Optional[dict]:
+        vehicle = self._vehicles.pop(request_id, None)
+        if vehicle is not None:
+            ids = self._by_plate.get(vehicle["plate_number"])
+            if ids is not None:
+                ids.pop(request_id, None)
+                if not ids:
+                    del self._by_plate[vehicle["plate_number"]]
+        return vehicle
+
+    def add(self, vehicle: dict) -> dict:
+        """Store a request; a redelivered request with a known id is not duplicated."""
+        vehicle = {**vehicle, "request_id": vehicle.get("request_id") or uuid.uuid4().hex}
+        with self._lock:
+            existing = self._vehicles.get(vehicle["request_id"])
+            if existing is not None:
+                return existing
+            self._db.execute(
+                "INSERT OR IGNORE INTO pending_approvals (request_id, plate_number, received_at, payload)"
+                " VALUES (?, ?, ?, ?)",
+                (vehicle["request_id"], vehicle["plate_number"], time.time(), json.dumps(vehicle)),
+            )
+            self._index(vehicle)
+        return vehicle
+
+    def get(self, request_id: str) -> Optional[dict]:
+        return self._vehicles.get(request_id)
+
+    def ids_for_plate(self, plate_number: str) -> List[str]:
+        with self._lock:
+            return list(self._by_plate.get(plate_number, ()))
+
+    def remove(self, request_id: str) -> Optional[dict]:
+        """Remove and return a request, or None if another caller already handled it."""
+        with self._lock:
+            vehicle = self._unindex(request_id)
+            if vehicle is not None:
+                self._db.execute("DELETE FROM pending_approvals WHERE request_id = ?", (request_id,))
+            return vehicle
+
+    def remove_many(self, request_ids: List[str]) -> Tuple[List[dict], List[str]]:
+        """Remove all of the requests or none: returns (removed, missing ids)."""
+        request_ids = list(dict.fromkeys(request_ids))
+        with self._lock:
+            missing = [request_id for request_id in request_ids if request_id not in self._vehicles]
+            if missing:
+                return [], missing
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "DELETE FROM pending_approvals WHERE request_id = ?", [(i,) for i in request_ids]
+                )
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+            return [self._unindex(request_id) for request_id in request_ids], []
+
+    def take_by_plate(self, plate_number: str) -> Optional[dict]:
+        """Remove and return the oldest pending request for a plate."""
+        with self._lock:
+            ids = self._by_plate.get(plate_number)
+            if not ids:
+                return None
+            request_id = next(iter(ids))
+            self._db.execute("DELETE FROM pending_approvals WHERE request_id = ?", (request_id,))
+            return self._unindex(request_id)
+
+    def list(self, plate_number: Optional[str] = None, offset: int = 0,
+             limit: Optional[int] = None) -> Tuple[List[dict], int]:
+        """A page of pending requests, oldest first, and the total matching the filter."""
+        with self._lock:
+            if plate_number is not None:
+                vehicles = [self._vehicles[i] for i in self._by_plate.get(plate_number, ())]
+            else:
+                vehicles = list(self._vehicles.values())
+        end = None if limit is None else offset + limit
+        return vehicles[offset:end], len(vehicles)
+
+    def __len__(self) -> int:
+        return len(self._vehicles)
+
+
+pending_approvals = PendingApprovals()
 
 def add_vehicle(vehicle):
-    pending_vehicles.append(vehicle)
+    return pending_approvals.add(vehicle)
 
 def get_all_pending():
-    return pending_vehicles
+    return pending_approvals.list()[0]
 
 def remove_vehicle(plate_number):
-    global pending_vehicles
-    pending_vehicles = [v for v in pending_vehicles if v["plate_number"] != plate_number]
+    return pending_approvals.take_by_plate(plate_number)
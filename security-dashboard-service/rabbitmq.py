@@ -2,40 +2,42 @@
 import pika
 import json
 from manual_approvals import add_vehicle
+from rabbitmq_publisher import RABBITMQ_HOST, publish, publish_many
+from event_stream import broadcaster
+from tracing import metrics
 
 def consume_manual_approvals():
-    connection = pika.BlockingConnection(pika.ConnectionParameters("localhost"))
+    connection = pika.BlockingConnection(pika.ConnectionParameters(RABBITMQ_HOST))
     channel = connection.channel()
     channel.queue_declare(queue="manual_approval_requests", durable=True)
 
     def callback(ch, method, properties, body):
         message = json.loads(body)
         print(f"[x] Received manual approval request: {message}")
-        add_vehicle(message)
+        metrics.queue_wait(message.get("trace"), "manual_approval_requests")
+        # Journaled before the ack, so a restart never needs the queue replayed
+        vehicle = add_vehicle(message)
+        broadcaster.publish("pending_added", vehicle)
         ch.basic_ack(delivery_tag=method.delivery_tag)
 
     channel.basic_consume(queue="manual_approval_requests", on_message_callback=callback)
     print(" [*] Waiting for manual approval requests. To exit press CTRL+C")
     channel.start_consuming()
 
-def send_manual_approval(vehicle):
-    connection = pika.BlockingConnection(pika.ConnectionParameters("localhost"))
-    channel = connection.channel()
-
-    channel.queue_declare(queue="vehicle.authorization.result", durable=True)
-
+def approval_message(vehicle):
     # Use the status and security_clear from the vehicle parameter
-    message = {
+    return {
         "plate_number": vehicle["plate_number"],
         "status": vehicle.get("status", "manually approved"),
         "security_clear": vehicle.get("security_clear", True),
-        "timestamp": vehicle["timestamp"]
+        "timestamp": vehicle["timestamp"],
+        # Time from the authorization decision to the guard's is the manual_decision stage
+        "trace": metrics.mark(vehicle.get("trace"), "manual_decision")
     }
 
-    channel.basic_publish(
-        exchange="",
-        routing_key="vehicle.authorization.result",
-        body=json.dumps(message),
-        properties=pika.BasicProperties(delivery_mode=2)
-    )
-    connection.close()
\ No newline at end of file
+def send_manual_approval(vehicle):
+    publish("vehicle.authorization.result", approval_message(vehicle))
+
+def send_manual_approvals(vehicles):
+    # One pipelined burst on the shared channel; a PublishError says how many went out
+    return publish_many("vehicle.authorization.result", [approval_message(vehicle) for vehicle in vehicles])
@@ -1,51 +1,71 @@
-from ultralytics import YOLO
 import cv2
 import time
-from publisher import publish_alert
+from inference_server import inference_server
+from preview import SHOW_WINDOWS, get_feed
 
-def run_yolo_detection():
-    model = YOLO("yolov8n.pt")
-    cap = cv2.VideoCapture(0)
+def run_yolo_detection(location, ring, alerts):
+    """Detect people in one camera's frame ring; alerts go to the publisher process."""
+    # The model is loaded once per process and shared by every camera thread
+    inference_server.start()
+    feed = get_feed(location)
 
     last_alert_time = 0
     cooldown = 15  
+    pending = None
+    result = None
+    seq = 0
 
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        results = model(frame)
-        boxes = results[0].boxes
-
-        person_detected = False
-        for box in boxes:
-            cls_id = int(box.cls[0])
-            label = model.names[cls_id]
-            if label == "person":
-                person_detected = True
-                confidence = float(box.conf[0])
-                break  # Only care about the first person detected
-
-        current_time = time.time()
-        if person_detected:
-            if current_time - last_alert_time > cooldown:
-                publish_alert({
-                    "type": "suspicious_activity",
-                    "label": "person",
-                    "confidence": confidence,
-                    "location": "Gate A",
-                })
-                print("🔔 Alert sent for suspicious activity (person).")
-                last_alert_time = current_time
-            else:
-                print("⏳ Person detected but alert suppressed (cooldown).")
-
-        annotated = results[0].plot()
-        cv2.imshow("YOLOv8 Detection", annotated)
-
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
+        seq, frame = ring.wait_newer(seq)
+        if frame is None:
+            continue
+
+        # Keep following the ring while the previous sample is in the batch
+        if pending is not None and pending.done():
+            try:
+                result = pending.result()
+            except Exception as e:
+                print(f"Error running YOLO for {location}: {e}")
+                result = None
+            pending = None
+
+            if result is not None:
+                if feed.watched.is_set():
+                    feed.offer(result.orig_img, result)
+
+                person_detected = False
+                for cls_id, conf in zip(result.boxes.cls.tolist(), result.boxes.conf.tolist()):
+                    if inference_server.names[int(cls_id)] == "person":
+                        person_detected = True
+                        confidence = float(conf)
+                        break  # Only care about the first person detected
+
+                current_time = time.time()
+                if person_detected:
+                    if current_time - last_alert_time > cooldown:
+                        alerts.put({
+                            "type": "suspicious_activity",
+                            "label": "person",
+                            "confidence": confidence,
+                            "location": location,
+                        })
+                        print(f"🔔 Alert sent for suspicious activity (person) at {location}.")
+                        last_alert_time = current_time
+                    else:
+                        print("⏳ Person detected but alert suppressed (cooldown).")
+
+        # Only sampled frames leave shared memory; the ring slot is reused by the capture process
+        if pending is None and inference_server.sample_due(location):
+            sample = frame.copy()
+            # Drop a copy torn by the capture process reusing the slot mid-read
+            if ring.valid(seq):
+                pending = inference_server.submit(location, sample)
+
+        # Annotations are only drawn when a window or preview viewer will see them
+        if SHOW_WINDOWS:
+            cv2.imshow(f"YOLOv8 Detection - {location}", result.plot() if result is not None else frame)
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+
+    if SHOW_WINDOWS:
+        cv2.destroyAllWindows()
@@ -0,0 +1,95 @@
+# frame_ring.py
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+
+# Frames are normalized to this size so every ring has a fixed layout
+FRAME_WIDTH, FRAME_HEIGHT = (int(n) for n in os.getenv("SURVEILLANCE_FRAME_SIZE", "1280x720").split("x"))
+RING_SLOTS = int(os.getenv("SURVEILLANCE_RING_SLOTS", "8"))
+RING_POLL_INTERVAL = 0.005  # seconds between checks for a new frame
+
+
+class FrameRing:
+    """Ring buffer of frames in shared memory: one capture process writes, any process reads.
+
+    Readers get NumPy views straight into the shared block, so a frame is
+    never pickled or copied between processes. Each slot carries the
+    sequence number of the frame it holds, and the writer marks a slot -1
+    while overwriting it. A reader calls `valid(seq)` once it has copied or
+    processed a slot and drops the frame if the writer reached it meanwhile.
+    """
+
+    def __init__(self, slots: int = RING_SLOTS, width: int = FRAME_WIDTH, height: int = FRAME_HEIGHT):
+        self.slots = slots
+        self.shape = (height, width, 3)
+        frame_bytes = height * width * 3
+        self._shm: Optional[shared_memory.SharedMemory] = shared_memory.SharedMemory(
+            create=True, size=slots * frame_bytes
+        )
+        self.name = self._shm.name
+        self.latest = mp.RawValue("q", 0)
+        self.slot_seq = mp.RawArray("q", slots)
+        self._frames: Optional[np.ndarray] = None
+
+    def __getstate__(self):
+        # Child processes re-attach to the block by name
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        state["_frames"] = None
+        return state
+
+    def _attach(self) -> np.ndarray:
+        if self._frames is None:
+            if self._shm is None:
+                self._shm = shared_memory.SharedMemory(name=self.name)
+            self._frames = np.ndarray((self.slots, *self.shape), dtype=np.uint8, buffer=self._shm.buf)
+        return self._frames
+
+    def write(self, frame: np.ndarray):
+        frames = self._attach()
+        if frame.shape != self.shape:
+            frame = cv2.resize(frame, (self.shape[1], self.shape[0]), interpolation=cv2.INTER_AREA)
+        seq = self.latest.value + 1
+        slot = seq % self.slots
+        self.slot_seq[slot] = -1
+        frames[slot] = frame
+        self.slot_seq[slot] = seq
+        self.latest.value = seq
+
+    def valid(self, seq: int) -> bool:
+        return self.slot_seq[seq % self.slots] == seq
+
+    def wait_newer(self, seq: int, timeout: float = 1.0) -> Tuple[int, Optional[np.ndarray]]:
+        """Newest frame after `seq` as a read-only view; (seq, None) on timeout."""
+        frames = self._attach()
+        deadline = time.monotonic() + timeout
+        while True:
+            latest = self.latest.value
+            if latest > seq and self.valid(latest):
+                view = frames[latest % self.slots]
+                view.flags.writeable = False
+                return latest, view
+            if time.monotonic() >= deadline:
+                return seq, None
+            time.sleep(RING_POLL_INTERVAL)
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+            self._frames = None
+
+    def unlink(self):
+        """Free the shared block; only the process that created the ring calls this."""
+        self._frames = None
+        if self._shm is not None:
+            self._shm.close()
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = None
@@ -0,0 +1,125 @@
+# inference_server.py
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+from ultralytics import YOLO
+
+YOLO_MODEL = os.getenv("YOLO_MODEL", "yolov8n.pt")
+YOLO_IMGSZ = int(os.getenv("YOLO_IMGSZ", "640"))
+YOLO_CONFIDENCE = float(os.getenv("YOLO_CONFIDENCE", "0.25"))
+# Only these classes are ever reported; everything else is dropped inside NMS
+YOLO_CLASSES = os.getenv("YOLO_CLASSES", "person,bicycle,car,motorcycle,bus,truck")
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))
+YOLO_BATCH_WAIT = float(os.getenv("YOLO_BATCH_WAIT_SECONDS", "0.02"))
+YOLO_SAMPLE_FPS = float(os.getenv("YOLO_SAMPLE_FPS", "5"))  # frames per second per camera sent to the model
+
+
+class InferenceServer:
+    """One YOLO model shared by every camera thread, run on batches of frames.
+
+    Each camera holds at most one pending frame: a newer frame replaces a
+    pending one, so a slow model never builds a backlog of stale frames.
+    The server thread gathers pending frames from all cameras, runs them
+    through the model as one batch and resolves each camera's Future with
+    the Results for its own frame.
+    """
+
+    def __init__(self, model_path: str = YOLO_MODEL, imgsz: int = YOLO_IMGSZ,
+                 batch_size: int = YOLO_BATCH_SIZE, batch_wait: float = YOLO_BATCH_WAIT,
+                 sample_fps: float = YOLO_SAMPLE_FPS):
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.sample_interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+        self.model = None
+        self.classes: Optional[List[int]] = None
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Tuple[object, Future]] = {}
+        self._last_sampled: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.frames = 0
+        self.dropped = 0
+        self.skipped = 0
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self.model = YOLO(self.model_path)
+            wanted = {name.strip() for name in YOLO_CLASSES.split(",") if name.strip()}
+            self.classes = [cls_id for cls_id, name in self.model.names.items() if name in wanted] or None
+            self._thread = threading.Thread(target=self._run, name="yolo-inference", daemon=True)
+            self._thread.start()
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self.model.names
+
+    def sample_due(self, camera_id: str) -> bool:
+        """Whether the next frame from this camera would be sampled; lets callers skip copying it."""
+        return time.monotonic() - self._last_sampled.get(camera_id, 0.0) >= self.sample_interval
+
+    def submit(self, camera_id: str, frame) -> Optional[Future]:
+        """Queue a camera frame; returns None when the frame is skipped by sampling."""
+        now = time.monotonic()
+        with self._cond:
+            if now - self._last_sampled.get(camera_id, 0.0) < self.sample_interval:
+                self.skipped += 1
+                return None
+            self._last_sampled[camera_id] = now
+            future = Future()
+            stale = self._pending.pop(camera_id, None)
+            if stale is not None:
+                stale[1].cancel()
+                self.dropped += 1
+            self._pending[camera_id] = (frame, future)
+            self._cond.notify()
+            return future
+
+    def _collect(self) -> List[Tuple[object, Future]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending)
+            # Give other cameras a moment to join the batch
+            deadline = time.monotonic() + self.batch_wait
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    break
+            camera_ids = list(self._pending)[:self.batch_size]
+            return [self._pending.pop(camera_id) for camera_id in camera_ids]
+
+    def _run(self):
+        while True:
+            batch = [(frame, future) for frame, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.model.predict(
+                    [frame for frame, _ in batch], imgsz=self.imgsz, conf=YOLO_CONFIDENCE,
+                    classes=self.classes, verbose=False,
+                )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self.batches += 1
+            self.frames += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch_size": round(self.frames / self.batches, 2) if self.batches else 0.0,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "pending": len(self._pending),
+        }
+
+
+inference_server = InferenceServer()
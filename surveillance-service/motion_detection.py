@@ -1,37 +1,39 @@
 import cv2
-from publisher import publish_alert
+from datetime import datetime
+from motion_engine import MOTION_ZONES, MotionEngine, parse_zones
+from preview import SHOW_WINDOWS
 
-def detect_motion():
-    cap = cv2.VideoCapture(0)
-    _, frame1 = cap.read()
-    _, frame2 = cap.read()
+def detect_motion(ring, alerts, location):
+    """Watch one camera's frame ring for motion; alerts go to the publisher process."""
+    # One alert per zone per cooldown, however many things move in it
+    engine = MotionEngine(parse_zones(MOTION_ZONES, location))
+    seq = 0
 
-    while cap.isOpened():
-        diff = cv2.absdiff(frame1, frame2)
-        gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-        blur = cv2.GaussianBlur(gray, (5,5), 0)
-        _, thresh = cv2.threshold(blur, 20, 255, cv2.THRESH_BINARY)
-        dilated = cv2.dilate(thresh, None, iterations=3)
-        contours, _ = cv2.findContours(dilated, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    while True:
+        seq, frame = ring.wait_newer(seq)
+        if frame is None:
+            continue
 
-        for contour in contours:
-            if cv2.contourArea(contour) < 900:
-                continue
-            print("[ALERT] Motion Detected!")
-            publish_alert({
+        gray = engine.downscale(frame)
+        # The capture process may have reused the slot while it was being read
+        if not ring.valid(seq):
+            continue
+
+        for event in engine.update(gray):
+            print(f"[ALERT] Motion Detected in {event['zone']}!")
+            alerts.put({
                 "type": "motion_after_hours",
-                "location": "Zone B",
-                "timestamp": "auto",  # You can use datetime.now().isoformat() instead
+                "label": "motion",
+                "confidence": round(event["activity"], 3),
+                "location": event["zone"],
+                "timestamp": datetime.now().isoformat(),
+                "coalesced": event["coalesced"],
             })
 
-        frame1 = frame2
-        ret, frame2 = cap.read()
-        if not ret:
-            break
-
-        cv2.imshow("Motion Detection", frame2)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
+        if SHOW_WINDOWS:
+            cv2.imshow("Motion Detection", frame)
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
 
-    cap.release()
-    cv2.destroyAllWindows()
+    if SHOW_WINDOWS:
+        cv2.destroyAllWindows()
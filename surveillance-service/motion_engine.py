@@ -0,0 +1,114 @@
+# motion_engine.py
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+
+MOTION_WIDTH = int(os.getenv("MOTION_WIDTH", "160"))  # pixels; frames are compared at this width
+MOTION_PIXEL_DELTA = int(os.getenv("MOTION_PIXEL_DELTA", "25"))
+MOTION_MIN_ACTIVITY = float(os.getenv("MOTION_MIN_ACTIVITY", "0.01"))  # fraction of a zone's pixels
+MOTION_LEARNING_RATE = float(os.getenv("MOTION_LEARNING_RATE", "0.05"))
+MOTION_WARMUP_FRAMES = int(os.getenv("MOTION_WARMUP_FRAMES", "25"))
+MOTION_ALERT_COOLDOWN = float(os.getenv("MOTION_ALERT_COOLDOWN_SECONDS", "30"))
+# {"Zone B": [[x, y], ...]} with coordinates as fractions of the frame; default is the whole frame
+MOTION_ZONES = os.getenv("MOTION_ZONES", "")
+
+Polygon = Sequence[Tuple[float, float]]
+
+
+def parse_zones(spec: str, default_name: str) -> Dict[str, Polygon]:
+    if not spec:
+        return {default_name: [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]}
+    return {name: [tuple(point) for point in polygon] for name, polygon in json.loads(spec).items()}
+
+
+class MotionZone:
+    __slots__ = ("name", "polygon", "mask", "area", "last_alert", "coalesced", "peak")
+
+    def __init__(self, name: str, polygon: Polygon):
+        self.name = name
+        self.polygon = polygon
+        self.mask: Optional[np.ndarray] = None
+        self.area = 0
+        self.last_alert = 0.0
+        self.coalesced = 0  # motion events suppressed since the last alert
+        self.peak = 0.0
+
+
+class MotionEngine:
+    """Zone-based motion detection on downscaled grayscale frames.
+
+    Each frame is compared with a running-average background rather than
+    only the previous frame, so slow lighting changes are absorbed. The
+    zone polygons are rasterized once into boolean masks at the working
+    resolution, and a zone's activity is the fraction of its pixels that
+    changed. A zone raises at most one alert per cooldown window. Motion
+    seen during the window is folded into one alert sent when it ends.
+    """
+
+    def __init__(self, zones: Dict[str, Polygon], width: int = MOTION_WIDTH,
+                 pixel_delta: int = MOTION_PIXEL_DELTA, min_activity: float = MOTION_MIN_ACTIVITY,
+                 learning_rate: float = MOTION_LEARNING_RATE, cooldown: float = MOTION_ALERT_COOLDOWN):
+        self.zones = [MotionZone(name, polygon) for name, polygon in zones.items()]
+        self.width = width
+        self.pixel_delta = pixel_delta
+        self.min_activity = min_activity
+        self.learning_rate = learning_rate
+        self.cooldown = cooldown
+        self._background: Optional[np.ndarray] = None
+        self.frames = 0
+
+    def downscale(self, frame) -> np.ndarray:
+        """The grayscale working copy of a frame that `update` takes."""
+        height = max(1, frame.shape[0] * self.width // frame.shape[1])
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+    def _build_masks(self, shape: Tuple[int, int]):
+        height, width = shape
+        for zone in self.zones:
+            points = np.array([(x * (width - 1), y * (height - 1)) for x, y in zone.polygon], dtype=np.int32)
+            raster = np.zeros(shape, dtype=np.uint8)
+            cv2.fillPoly(raster, [points], 1)
+            zone.mask = raster.astype(bool)
+            zone.area = max(1, int(np.count_nonzero(zone.mask)))
+
+    def process(self, frame) -> List[dict]:
+        """Feed every frame; returns one coalesced event per zone whose cooldown allows an alert."""
+        return self.update(self.downscale(frame))
+
+    def update(self, gray: np.ndarray) -> List[dict]:
+        """`process` for a frame that was already downscaled."""
+        self.frames += 1
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            self._build_masks(gray.shape)
+            return []
+
+        moving = cv2.absdiff(gray, cv2.convertScaleAbs(self._background)) > self.pixel_delta
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        if self.frames <= MOTION_WARMUP_FRAMES:
+            return []
+
+        events = []
+        now = time.time()
+        for zone in self.zones:
+            activity = np.count_nonzero(moving & zone.mask) / zone.area
+            moved = activity >= self.min_activity
+            if now - zone.last_alert < self.cooldown:
+                if moved:
+                    zone.coalesced += 1
+                    zone.peak = max(zone.peak, activity)
+                continue
+            # Motion folded in during the cooldown is reported once it ends, even if the zone is quiet now
+            if not moved and not zone.coalesced:
+                continue
+            if moved:
+                zone.peak = max(zone.peak, activity)
+            events.append({"zone": zone.name, "activity": zone.peak, "coalesced": zone.coalesced})
+            zone.last_alert = now
+            zone.coalesced = 0
+            zone.peak = 0.0
+        return events
@@ -0,0 +1,114 @@
+# preview.py
+import os
+import threading
+from typing import Any, Dict, Optional
+import cv2
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+
+# Desktop windows are for local debugging only; servers run headless
+SHOW_WINDOWS = os.getenv("SURVEILLANCE_DISPLAY", "0") == "1"
+# Port of the optional MJPEG preview; empty disables it
+PREVIEW_PORT = os.getenv("SURVEILLANCE_PREVIEW_PORT", "")
+PREVIEW_JPEG_QUALITY = 80
+
+
+class PreviewFeed:
+    """Annotated MJPEG preview of one camera, rendered only while someone watches.
+
+    The camera loop offers its latest frame and YOLO result only when
+    `watched` is set, which costs nothing in production. The encoder thread
+    draws and JPEG-encodes each offered frame once, and every viewer
+    streams the same chunk.
+    """
+
+    def __init__(self, location: str):
+        self.location = location
+        self.watched = threading.Event()
+        self._cond = threading.Condition()
+        self._offered: Any = None
+        self._chunk: Optional[bytes] = None
+        self._seq = 0
+        self._viewers = 0
+        threading.Thread(target=self._encode_loop, name=f"preview-{location}", daemon=True).start()
+
+    def offer(self, frame, result=None):
+        with self._cond:
+            self._offered = (frame, result)
+            self._cond.notify_all()
+
+    def _encode_loop(self):
+        while True:
+            self.watched.wait()
+            with self._cond:
+                self._cond.wait_for(lambda: self._offered is not None, timeout=1.0)
+                offered, self._offered = self._offered, None
+            if offered is None:
+                continue
+            frame, result = offered
+            image = result.plot() if result is not None else frame
+            ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, PREVIEW_JPEG_QUALITY])
+            if not ok:
+                continue
+            with self._cond:
+                self._chunk = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n'
+                self._seq += 1
+                self._cond.notify_all()
+
+    def _subscribe(self, delta: int):
+        with self._cond:
+            self._viewers += delta
+            if self._viewers:
+                self.watched.set()
+            else:
+                self.watched.clear()
+                self._offered = None
+
+    def stream(self):
+        """Generator of multipart chunks for one viewer."""
+        self._subscribe(1)
+        try:
+            seq = 0
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq > seq, timeout=1.0)
+                    if self._seq == seq:
+                        continue
+                    seq, chunk = self._seq, self._chunk
+                yield chunk
+        finally:
+            self._subscribe(-1)
+
+
+feeds: Dict[str, PreviewFeed] = {}
+_feeds_lock = threading.Lock()
+
+def get_feed(location: str) -> PreviewFeed:
+    with _feeds_lock:
+        if location not in feeds:
+            feeds[location] = PreviewFeed(location)
+        return feeds[location]
+
+
+app = FastAPI()
+
+@app.get("/cameras")
+def list_cameras():
+    return sorted(feeds)
+
+@app.get("/cameras/{location}/preview")
+def camera_preview(location: str):
+    feed = feeds.get(location)
+    if feed is None:
+        raise HTTPException(status_code=404, detail=f"Camera {location} not found")
+    return StreamingResponse(feed.stream(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+def start_preview_server():
+    if not PREVIEW_PORT:
+        return
+    server = uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=int(PREVIEW_PORT), log_level="warning"))
+    # Signal handlers can only be installed from the main thread
+    server.install_signal_handlers = lambda: None
+    threading.Thread(target=server.run, name="preview-server", daemon=True).start()
+    print(f"[INFO] Preview available on port {PREVIEW_PORT}")
@@ -1,18 +1,30 @@
-import pika
-import json
+import queue
+import time
+from rabbitmq_publisher import publish, publish_many
+
+ALERT_QUEUE = 'surveillance.alerts'
+PUBLISH_BATCH_SIZE = 100
+PUBLISH_RETRY_DELAY = 5  # seconds
 
 def publish_alert(message: dict):
-    connection = pika.BlockingConnection(pika.ConnectionParameters('localhost'))
-    channel = connection.channel()
-    channel.queue_declare(queue='surveillance.alerts', durable=True)
-    
-    channel.basic_publish(
-        exchange='',
-        routing_key='surveillance.alerts',
-        body=json.dumps(message),
-        properties=pika.BasicProperties(
-            delivery_mode=2,  # make message persistent
-        )
-    )
+    publish(ALERT_QUEUE, message)
     print("[INFO] Alert published:", message)
-    connection.close()
+
+def run_alert_publisher(alerts):
+    """Owns the only RabbitMQ connection; drains alerts from every detector process."""
+    while True:
+        batch = [alerts.get()]
+        while len(batch) < PUBLISH_BATCH_SIZE:
+            try:
+                batch.append(alerts.get_nowait())
+            except queue.Empty:
+                break
+        while True:
+            try:
+                publish_many(ALERT_QUEUE, batch)
+                break
+            except Exception as e:
+                print(f"[!] Could not publish {len(batch)} alerts, retrying: {e}")
+                time.sleep(PUBLISH_RETRY_DELAY)
+        for message in batch:
+            print("[INFO] Alert published:", message)
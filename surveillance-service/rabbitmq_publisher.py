@@ -0,0 +1,148 @@
+# rabbitmq_publisher.py
+# Shared by every service that publishes to RabbitMQ; keep the copies identical.
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Iterable, Optional
+import pika
+from pika.exceptions import AMQPError
+
+try:
+    from dotenv import load_dotenv
+    # The settings below are read at import, which can come before a service's own load_dotenv()
+    load_dotenv()
+except ImportError:
+    pass  # vehicle-detector has no .env; it reads the process environment
+
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "localhost")
+PUBLISHER_CONFIRMS = os.getenv("RABBITMQ_PUBLISHER_CONFIRMS", "0") == "1"
+HEARTBEAT_INTERVAL = 10  # seconds between servicing heartbeats on an idle connection
+
+
+class PublishError(AMQPError):
+    """A publish that gave up after its retries; `sent` messages went out before it failed.
+
+    Only with publisher confirms is `sent` the number the broker accepted.
+    """
+
+    def __init__(self, target: str, sent: int, cause: Exception):
+        super().__init__(f"Publish to {target} failed after {sent} messages: {cause!r}")
+        self.sent = sent
+
+
+class RabbitPublisher:
+    """One long-lived connection and channel shared by all publishers in a process.
+
+    pika's BlockingConnection is not thread-safe, so every publish is serialized
+    behind a lock. Queues and exchanges are declared once per channel, and a
+    dropped connection is reopened transparently on the next publish.
+    """
+
+    def __init__(self, host: str = RABBITMQ_HOST, confirms: bool = PUBLISHER_CONFIRMS, retries: int = 3):
+        self.host = host
+        self.confirms = confirms
+        self.retries = retries
+        self._connection = None
+        self._channel = None
+        self._declared = set()
+        self._lock = threading.Lock()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def _open_channel(self):
+        if self._channel is not None and self._channel.is_open:
+            return self._channel
+        self._close()
+        self._connection = pika.BlockingConnection(pika.ConnectionParameters(self.host))
+        self._channel = self._connection.channel()
+        if self.confirms:
+            # basic_publish now blocks until the broker acks and raises on nack
+            self._channel.confirm_delivery()
+        self._declared = set()
+        if self._heartbeat_thread is None:
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+            self._heartbeat_thread.start()
+        return self._channel
+
+    def _declare(self, channel, exchange: str, queue: str):
+        if (exchange, queue) not in self._declared:
+            if exchange:
+                channel.exchange_declare(exchange=exchange, exchange_type="fanout", durable=True)
+            else:
+                channel.queue_declare(queue=queue, durable=True)
+            self._declared.add((exchange, queue))
+
+    def _close(self):
+        try:
+            if self._connection is not None and self._connection.is_open:
+                self._connection.close()
+        except AMQPError:
+            pass
+        self._connection = None
+        self._channel = None
+
+    def _heartbeat_loop(self):
+        # An idle BlockingConnection only answers heartbeats while pika is
+        # processing I/O, so poke it periodically to keep the broker from
+        # dropping the connection between bursts.
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                try:
+                    if self._connection is not None and self._connection.is_open:
+                        self._connection.process_data_events(time_limit=0)
+                except AMQPError:
+                    self._close()
+
+    def publish(self, queue: str, message: dict, properties: Optional[pika.BasicProperties] = None):
+        self.publish_many(queue, [message], properties)
+
+    def publish_many(self, queue: str, messages: Iterable[dict], properties: Optional[pika.BasicProperties] = None) -> int:
+        """Publish messages back to back on the shared channel and return how many were sent."""
+        return self._send("", queue, messages, properties)
+
+    def broadcast(self, exchange: str, message: dict, properties: Optional[pika.BasicProperties] = None):
+        """Publish to a fanout exchange, so every queue bound to it gets a copy."""
+        self._send(exchange, "", [message], properties)
+
+    def _send(self, exchange: str, routing_key: str, messages: Iterable[dict],
+              properties: Optional[pika.BasicProperties]) -> int:
+        bodies = [json.dumps(message) for message in messages]
+        properties = properties or pika.BasicProperties(delivery_mode=2)  # make message persistent
+        target = exchange or routing_key
+        sent = 0
+        with self._lock:
+            for attempt in range(1, self.retries + 1):
+                try:
+                    channel = self._open_channel()
+                    self._declare(channel, exchange, routing_key)
+                    for body in bodies[sent:]:
+                        channel.basic_publish(exchange=exchange, routing_key=routing_key, body=body, properties=properties)
+                        sent += 1
+                    return sent
+                except AMQPError as e:
+                    print(f"[!] Publish to {target} failed (attempt {attempt}/{self.retries}): {e!r}")
+                    self._close()
+                    if attempt == self.retries:
+                        raise PublishError(target, sent, e) from e
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+publisher = RabbitPublisher()
+atexit.register(publisher.close)
+
+
+def publish(queue: str, message: dict):
+    publisher.publish(queue, message)
+
+
+def publish_many(queue: str, messages: Iterable[dict]) -> int:
+    return publisher.publish_many(queue, messages)
+
+
+def broadcast(exchange: str, message: dict):
+    publisher.broadcast(exchange, message)
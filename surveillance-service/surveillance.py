@@ -1,25 +1,144 @@
+import multiprocessing as mp
+import os
 import threading
+import time
 from datetime import datetime
-from detection_yolo import run_yolo_detection
-from motion_detection import detect_motion
+from typing import Callable, Dict, List, Optional, Union
+import cv2
+from frame_ring import FrameRing
+
+# "location=source" pairs; a source is a device index, an RTSP URL or a video file
+CAMERA_SOURCES = os.getenv("SURVEILLANCE_CAMERAS", "Gate A=0")
+RESTART_DELAY = 1.0  # seconds; doubled for a worker that keeps crashing
+MAX_RESTART_DELAY = 30.0
+STABLE_AFTER = 60.0  # seconds a worker must run before its restart delay resets
+
+def parse_sources(spec: str) -> Dict[str, Union[int, str]]:
+    """Parse "Gate A=0,Zone B=rtsp://..." into {location: source}."""
+    sources = {}
+    for index, entry in enumerate(part.strip() for part in spec.split(",") if part.strip()):
+        location, separator, source = entry.partition("=")
+        # A bare URL may itself contain "=", so only treat a plain name as a location
+        if not separator or ":" in location or "/" in location:
+            location, source = f"Camera {index}", entry
+        source = source.strip()
+        sources[location.strip()] = int(source) if source.isdigit() else source
+    return sources
+
+def capture_worker(location, source, ring):
+    """Reads one camera into its shared-memory ring; exits on a dead source so it gets restarted."""
+    cap = cv2.VideoCapture(source)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                print(f"[!] Camera {location} stopped delivering frames")
+                break
+            ring.write(frame)
+    finally:
+        cap.release()
+
+def yolo_worker(rings, alerts):
+    """One process for all cameras so they share a single batched YOLO model."""
+    from detection_yolo import run_yolo_detection
+    from preview import start_preview_server
+
+    start_preview_server()
+    threads = [
+        threading.Thread(target=run_yolo_detection, args=(location, ring, alerts), name=f"yolo-{location}", daemon=True)
+        for location, ring in rings.items()
+    ]
+    for thread in threads:
+        thread.start()
+    # If any camera thread dies, exit and let the supervisor start a clean process
+    while all(thread.is_alive() for thread in threads):
+        time.sleep(1)
+
+def motion_worker(location, ring, alerts):
+    from motion_detection import detect_motion
+    detect_motion(ring, alerts, location)
+
+def publisher_worker(alerts):
+    from publisher import run_alert_publisher
+    run_alert_publisher(alerts)
+
+
+class Worker:
+    """A supervised child process, recreated from the same target and args when it exits."""
+
+    def __init__(self, name: str, target: Callable, args: tuple):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.process: Optional[mp.Process] = None
+        self.started_at = 0.0
+        self.restart_delay = RESTART_DELAY
+        self.restart_at = 0.0
+        self.restarts = 0
+
+    def start(self):
+        self.process = mp.Process(target=self.target, args=self.args, name=self.name, daemon=True)
+        self.process.start()
+        self.started_at = time.monotonic()
+
+    def check(self):
+        """Restart the process if it exited, backing off when it keeps crashing."""
+        now = time.monotonic()
+        if self.process.is_alive():
+            if now - self.started_at > STABLE_AFTER:
+                self.restart_delay = RESTART_DELAY
+            return
+        if self.restart_at == 0.0:
+            print(f"[!] Worker {self.name} exited with code {self.process.exitcode}; "
+                  f"restarting in {self.restart_delay:.0f}s")
+            self.restart_at = now + self.restart_delay
+            self.restart_delay = min(self.restart_delay * 2, MAX_RESTART_DELAY)
+        elif now >= self.restart_at:
+            self.restart_at = 0.0
+            self.restarts += 1
+            self.start()
+
+    def stop(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+
 
 def main():
     print("[INFO] Starting Surveillance Service...")
 
-    # Run YOLO detection for vehicle/person detection
-    yolo_thread = threading.Thread(target=run_yolo_detection)
-    yolo_thread.start()
+    # Frames live in shared memory; detector processes read them without copies
+    sources = parse_sources(CAMERA_SOURCES)
+    rings = {location: FrameRing() for location in sources}
+    # Every detector hands its alerts to a single publisher process
+    alerts = mp.Queue()
+
+    workers: List[Worker] = [Worker("publisher", publisher_worker, (alerts,))]
+    for location, source in sources.items():
+        workers.append(Worker(f"capture-{location}", capture_worker, (location, source, rings[location])))
+    workers.append(Worker("yolo", yolo_worker, (rings, alerts)))
 
     # Check if it's after hours (1 AM - 5 AM)
     current_hour = datetime.now().hour
     if current_hour >= 1 or current_hour <= 5:  # Between 1 AM and 5 AM
         print("[INFO] Motion detection activated (after hours)...")
-        motion_thread = threading.Thread(target=detect_motion)
-        motion_thread.start()
+        for location, ring in rings.items():
+            workers.append(Worker(f"motion-{location}", motion_worker, (location, ring, alerts)))
 
-    # Wait for the YOLO thread to finish
-    yolo_thread.join()
-    vehicle_thread.join()
+    for worker in workers:
+        worker.start()
+    try:
+        while True:
+            time.sleep(1)
+            for worker in workers:
+                worker.check()
+    except KeyboardInterrupt:
+        print("[INFO] Stopping Surveillance Service...")
+    finally:
+        for worker in workers:
+            worker.stop()
+        for ring in rings.values():
+            ring.unlink()
 
 if __name__ == "__main__":
     main()
@@ -1,21 +1,37 @@
 from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Optional
 from rabbitmq import publish_vehicle_detected
+from tracing import metrics, new_trace
 
 app = FastAPI()
 
 class VehicleEntry(BaseModel):
     plate_number: str
-    timestamp: datetime = datetime.now()
+    # default_factory, so each request gets its own arrival time rather than the import time
+    timestamp: datetime = Field(default_factory=datetime.now)
     filename: str
+    trace: Optional[dict] = None
 
 @app.post("/detect")
 def detect_vehicle(entry: VehicleEntry):
+    # The plate detector starts the trace; direct callers get a fresh one
+    trace = metrics.mark(entry.trace or new_trace(), "detect_received")
     data = {
         "plate_number": entry.plate_number,
         "timestamp": entry.timestamp.isoformat(),
-        "filename": entry.filename
+        "filename": entry.filename,
+        "trace": trace
     }
     publish_vehicle_detected(data)
+    # Stamped once the publish returns, so the stage covers it; the sent body stops at detect_received
+    metrics.mark(trace, "published")
     return {"message": "Vehicle detected", "data": data}
+
+@app.get("/metrics")
+def get_metrics(format: str = "prometheus"):
+    if format == "json":
+        return metrics.report()
+    return PlainTextResponse(metrics.prometheus("vehicle-detector"))
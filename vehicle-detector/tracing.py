@@ -0,0 +1,117 @@
+# tracing.py
+# Shared by every service on the gate path; keep the copies identical.
+import bisect
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+# Gate path stages in the order a plate passes through them
+STAGES = ("capture", "ocr_done", "detect_received", "published", "auth_start", "auth_end", "manual_decision", "logged")
+# Histogram bucket upper bounds in seconds, roughly logarithmic from 1ms to 2min
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def new_trace(**stages: float) -> Dict:
+    """Trace context that travels inside each message: a correlation id and stage timestamps."""
+    return {"id": uuid.uuid4().hex, "stages": dict(stages)}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; percentiles are interpolated within a bucket."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+
+class LatencyMetrics:
+    """Per-service latency histograms, keyed by (metric name, label)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+
+    def observe(self, name: str, label: str, seconds: float):
+        if seconds < 0:
+            seconds = 0.0  # clocks on different hosts can disagree slightly
+        with self._lock:
+            histogram = self._histograms.get((name, label))
+            if histogram is None:
+                histogram = self._histograms[(name, label)] = Histogram()
+            histogram.observe(seconds)
+
+    def mark(self, trace: Optional[Dict], stage: str, at: Optional[float] = None) -> Optional[Dict]:
+        """Stamp a stage on a trace and record its latency since the previous stamped stage."""
+        if not trace:
+            return trace
+        at = time.time() if at is None else at
+        stages = trace.setdefault("stages", {})
+        previous = [stages[s] for s in STAGES[:STAGES.index(stage)] if s in stages] if stage in STAGES else []
+        stages[stage] = at
+        if previous:
+            self.observe("stage_latency_seconds", stage, at - previous[-1])
+        if stage == STAGES[-1] and STAGES[0] in stages:
+            self.observe("gate_latency_seconds", "end_to_end", at - stages[STAGES[0]])
+        return trace
+
+    def queue_wait(self, trace: Optional[Dict], queue: str, at: Optional[float] = None):
+        """Record how long a message sat in a queue since its last stamped stage published it."""
+        stages = (trace or {}).get("stages")
+        if stages:
+            self.observe("queue_wait_seconds", queue, (time.time() if at is None else at) - max(stages.values()))
+
+    def report(self) -> Dict:
+        """p50/p95/p99 and counts for every histogram, in milliseconds."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            report: Dict[str, Dict] = {}
+            for (name, label), histogram in items:
+                report.setdefault(name, {})[label] = {
+                    "count": histogram.count,
+                    "avg_ms": round(histogram.sum / histogram.count * 1000, 2),
+                    **{f"p{q}_ms": round(histogram.percentile(q / 100) * 1000, 2) for q in (50, 95, 99)},
+                }
+        return report
+
+    def prometheus(self, service: str) -> str:
+        """The histograms in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, label), histogram in items:
+                    if metric != name:
+                        continue
+                    key = "queue" if name == "queue_wait_seconds" else "stage"
+                    labels = f'service="{service}",{key}="{label}"'
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = LatencyMetrics()